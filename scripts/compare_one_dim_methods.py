@@ -1,10 +1,10 @@
 import csv
 
 from src.methopt.one_dimensional_methods import (
-    pre_calc_for_fibonacci_method,
     dichotomy,
     golden_section,
     fibonacci_method,
+    sweep_epsilons,
 )
 
 EPSILONS = [0.5, 1e-1, 1e-2, 1e-3, 1e-4, 1e-5, 1e-6, 1e-7]
@@ -26,15 +26,16 @@ def print_matrix(f_out, results, description):
 
 
 def compare_methods(f, x_ans, a0, b0, max_steps, f_name, description):
-    fibonacci = pre_calc_for_fibonacci_method(max_steps)
     results = {}
+    dichotomy_results = sweep_epsilons(dichotomy, EPSILONS, a0, b0, f, max_steps)
+    golden_section_results = sweep_epsilons(
+        golden_section, EPSILONS, a0, b0, f, max_steps
+    )
 
     for eps in EPSILONS:
-        x_d, iterations_d, calls_d = dichotomy(eps, a0, b0, f, max_steps)
-        x_g, iterations_g, calls_g = golden_section(eps, a0, b0, f, max_steps)
-        x_f, iterations_f, calls_f = fibonacci_method(
-            eps, a0, b0, f, max_steps, fibonacci
-        )
+        x_d, iterations_d, calls_d = dichotomy_results[eps]
+        x_g, iterations_g, calls_g = golden_section_results[eps]
+        x_f, iterations_f, calls_f = fibonacci_method(eps, a0, b0, f, max_steps)
         assert approx_equal(x_d, x_ans, eps)
         assert approx_equal(x_g, x_ans, eps)
         assert approx_equal(x_f, x_ans, eps)
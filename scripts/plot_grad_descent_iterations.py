@@ -5,12 +5,6 @@ from methopt.grad_descent import grad_descent
 
 
 def count_iterations_for_strategy(f, f_grad, x0, step_adjustment_strategy):
-    iterations_count = 0
-
-    def iteration_callback(iteration_no, **kwargs):
-        nonlocal iterations_count
-        iterations_count = max(iterations_count, iteration_no)
-
     stopping_criterion = "function_margin"
     max_iterations_count = 1_000_000
 
@@ -21,11 +15,11 @@ def count_iterations_for_strategy(f, f_grad, x0, step_adjustment_strategy):
         max_iterations_count=max_iterations_count,
         step_adjustment_strategy=step_adjustment_strategy,
         stopping_criterion=stopping_criterion,
-        iteration_callback=iteration_callback,
         eps=1e-4,
+        telemetry=True,
     )
 
-    return iterations_count
+    return res.iterations
 
 
 def bars_for_function(function_label, f, f_grad, x0):
@@ -3,9 +3,13 @@ import numpy as np
 from random import uniform
 
 from methopt.grad_descent import grad_descent
+from methopt.coordinate_descent import coordinate_descent
 import methopt.step_adjustment_strategy as step
 from methopt.quadratic_assignment import (
-    generate_quadratic_assignment
+    generate_hessian,
+    fn_from_hessian,
+    grad_from_hessian,
+    hessian_of_fn,
 )
 
 
@@ -18,14 +22,9 @@ def run_experiment(strategy_name):
         writer.writeheader()
         for n in range(2, 12):
             for k in range(1, 11):
-                iterations_count = 0
-
-                def iteration_callback(iteration_no, **kwargs):
-                    nonlocal iterations_count
-                    iterations_count = max(iterations_count, iteration_no)
-
                 x0 = np.array([uniform(-10, 10) for i in range(n)])
-                f, grad = generate_quadratic_assignment(n, k)
+                hess = generate_hessian(n, k)
+                f, grad = fn_from_hessian(hess, n), grad_from_hessian(hess, n)
                 f_grad = lambda x: np.array(
                     [gr(x) for gr in grad])  # map(lambda gr: gr(x), grad)
 
@@ -40,19 +39,36 @@ def run_experiment(strategy_name):
                                                                  eps=1e-8),
                     'fibonacci': step.FibonacciStrategy(f, f_grad,
                                                         max_step=1000,
-                                                        max_steps=20, eps=1e-8)
+                                                        max_steps=20, eps=1e-8),
+                    'quadratic': step.QuadraticStrategy(f, f_grad,
+                                                        hessian_of_fn(hess)),
                 }
+                if strategy_name == 'coordinate_descent':
+                    iterations = 0
+
+                    def iteration_callback(x, iteration_no, block):
+                        nonlocal iterations
+                        iterations = iteration_no + 1
+
+                    # partials are evaluated at x0 only, then the gradient
+                    # is updated by a column of the Hessian per step
+                    coordinate_descent(grad, x0, Q=hessian_of_fn(hess),
+                                       iteration_callback=iteration_callback)
+                    writer.writerow(
+                        {"name": strategy_name, "n": str(n), "k": str(k),
+                         "iters": str(iterations)})
+                    continue
                 if strategy_name not in name_to_strategy:
                     print("Invalid strategy" + strategy_name)
                     return
 
-                g = grad_descent(f, f_grad, x0,
-                                 step_adjustment_strategy=name_to_strategy[
-                                     strategy_name],
-                                 iteration_callback=iteration_callback)
+                res = grad_descent(f, f_grad, x0,
+                                   step_adjustment_strategy=name_to_strategy[
+                                       strategy_name],
+                                   telemetry=True)
                 writer.writerow(
                     {"name": strategy_name, "n": str(n), "k": str(k),
-                     "iters": str(iterations_count)})
+                     "iters": str(res.iterations)})
 
 
 def main():
@@ -60,6 +76,8 @@ def main():
     run_experiment("golden_section")
     run_experiment("dichotomy")
     run_experiment("fibonacci")
+    run_experiment("quadratic")
+    run_experiment("coordinate_descent")
 
 
 if __name__ == "__main__":
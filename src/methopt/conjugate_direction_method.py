@@ -1,7 +1,11 @@
+from time import perf_counter
+
 import numpy as np
 
+from methopt.finite_differences import FiniteDifferences
 from methopt.grad_descent import grad_descent
 from methopt.step_adjustment_strategy import DivideStepStrategy
+from methopt.utils import IterationState, LastPointOracle, Telemetry
 
 
 def conjugate_direction_method_for_quadratic(
@@ -11,8 +15,11 @@ def conjugate_direction_method_for_quadratic(
     max_iterations_count=1000,
     iteration_callback=None,
     eps=None,
+    in_place=False,
 ):
     # f(x) = 0.5 (Qx, x) + (b, x)
+    # With 'in_place' the vectors are updated in buffers allocated once,
+    # 'iteration_callback' is given the same buffer every time.
     if iteration_callback is None:
         iteration_callback = lambda **kwargs: ()
 
@@ -28,30 +35,64 @@ def conjugate_direction_method_for_quadratic(
     p1 = w1
     if np.linalg.norm(p1) == 0:
         return x0
-    h1 = np.dot(p1, p1) / np.dot(Q @ p1, p1)
+    Qp1 = Q @ p1
+    h1 = np.dot(p1, p1) / np.dot(Qp1, p1)
     x1 = x0 + h1 * p1
 
+    if in_place:
+        x1, w1, p1, Qp1 = (np.array(v, dtype=np.float64) for v in (x1, w1, p1, Qp1))
+        return _conjugate_directions_in_place(
+            Q, x1, w1, p1, Qp1, h1, max_iterations_count, iteration_callback, eps
+        )
+
     x_prev = x1
     w_prev = w1
     p_prev = p1
+    Qp_prev = Qp1  # Q @ p_prev is the only product by Q per iteration
     h_prev = h1
     for k in range(1, max_iterations_count):
-        wk = w_prev - h_prev * (Q @ p_prev)
-        yk = np.dot(Q @ p_prev, wk) / np.dot(Q @ p_prev, p_prev)
+        wk = w_prev - h_prev * Qp_prev
+        yk = np.dot(Qp_prev, wk) / np.dot(Qp_prev, p_prev)
         pk = wk - yk * p_prev
         if abs(np.linalg.norm(pk)) < eps:
             return x_prev
-        hk = np.dot(wk, pk) / np.dot(Q @ pk, pk)
+        Qpk = Q @ pk
+        hk = np.dot(wk, pk) / np.dot(Qpk, pk)
         xk = x_prev + hk * pk
         iteration_callback(x=xk, iteration_no=k)
 
         p_prev = pk
+        Qp_prev = Qpk
         w_prev = wk
         x_prev = xk
         h_prev = hk
     return x_prev
 
 
+def _conjugate_directions_in_place(
+    Q, x, w, p, Qp, h, max_iterations_count, iteration_callback, eps
+):
+    """The loop of conjugate_direction_method_for_quadratic that updates
+    x, w, p and Qp = Q @ p in place
+
+    """
+    tmp = np.empty_like(x)
+    for k in range(1, max_iterations_count):
+        np.multiply(Qp, h, out=tmp)
+        w -= tmp
+        y = np.dot(Qp, w) / np.dot(Qp, p)
+        p *= -y
+        p += w
+        if abs(np.linalg.norm(p)) < eps:
+            return x
+        np.matmul(Q, p, out=Qp)
+        h = np.dot(w, p) / np.dot(Qp, p)
+        np.multiply(p, h, out=tmp)
+        x += tmp
+        iteration_callback(x=x, iteration_no=k)
+    return x
+
+
 def conjugate_direction_method(
     f,
     f_grad,
@@ -59,16 +100,66 @@ def conjugate_direction_method(
     max_iterations_count=1000,
     iteration_callback=None,
     eps=1e-3,  # Search accuracy
+    f_and_grad=None,
+    telemetry=False,
     **kwargs,
 ):
+    # With 'telemetry' a SolverResult (see ./utils.py) is returned
+    # instead of the point, with the time spent on line searches
+    # ("line_search") and on updating the point and the direction
+    # ("update").
+    recorder = Telemetry() if telemetry else None
+    x = x0
+    for state in iter_conjugate_direction_method(
+        f,
+        f_grad,
+        x0,
+        max_iterations_count=max_iterations_count,
+        iteration_callback=iteration_callback,
+        eps=eps,
+        f_and_grad=f_and_grad,
+        telemetry=recorder,
+    ):
+        x = state.x
+    if recorder is not None:
+        return recorder.result(x)
+    return x
+
+
+def iter_conjugate_direction_method(
+    f,
+    f_grad,
+    x0,
+    max_iterations_count=1000,
+    iteration_callback=None,
+    eps=1e-3,  # Search accuracy
+    f_and_grad=None,
+    telemetry=None,
+    **kwargs,
+):
+    # The same as conjugate_direction_method, but yields an
+    # IterationState (see ./utils.py) after every iteration and records
+    # the run in 'telemetry', a Telemetry, if it's given.
+    # Without 'f_grad' the gradient is found by central differences,
+    # see ./finite_differences.py
     if iteration_callback is None:
         iteration_callback = lambda **kwargs: ()
 
+    if f_grad is None and f_and_grad is None:
+        f_grad = FiniteDifferences(f).grad
+    # the gradient at xk was found by the line search along p_prev
+    oracle = LastPointOracle(f, f_grad, f_and_grad)
+    f, f_grad = oracle.f, oracle.grad
+    if telemetry is not None:
+        telemetry.oracle = oracle
+
     iteration_callback(x=x0, iteration_no=0)
     w1 = -f_grad(x0)
     p1 = w1
     if np.linalg.norm(w1) < eps:
-        return x0
+        if telemetry is not None:
+            telemetry.termination = "converged"
+        return
     # x1 = x0 + h1 * p1
 
     x_prev = x0
@@ -77,6 +168,8 @@ def conjugate_direction_method(
     for k in range(1, max_iterations_count):
         psi = lambda chi: f(x_prev + chi * p_prev)
         grad_psi = lambda chi: np.dot(f_grad(x_prev + chi * p_prev), p_prev)
+        if telemetry is not None:
+            started = perf_counter()
         hk = grad_descent(
             psi,
             grad_psi,
@@ -85,16 +178,26 @@ def conjugate_direction_method(
             eps=1e-7,
             step_adjustment_strategy=DivideStepStrategy(psi, grad_psi, eps=1e-11),
         )
+        if telemetry is not None:
+            telemetry.add_time("line_search", started)
+            telemetry.iterations = k
         xk = x_prev + hk * p_prev
         iteration_callback(x=xk, iteration_no=k)
+        yield IterationState(oracle, xk, k, hk)
+        if telemetry is not None:
+            started = perf_counter()
         wk = -f_grad(xk)
 
         if abs(np.linalg.norm(wk)) < eps:
-            return xk
+            if telemetry is not None:
+                telemetry.add_time("update", started)
+                telemetry.termination = "converged"
+            return
 
         yk = max(0, np.dot(wk - w_prev, wk) / np.dot(wk, wk))
         pk = wk + yk * p_prev
         p_prev = pk
         w_prev = wk
         x_prev = xk
-    return x_prev
+        if telemetry is not None:
+            telemetry.add_time("update", started)
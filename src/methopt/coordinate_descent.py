@@ -0,0 +1,144 @@
+import numpy as np
+
+from methopt.grad_descent import GradDescentException
+
+# steps of a block retried with smaller lengths before one is accepted
+MAX_RETRIES = 30
+
+
+def coordinate_descent(
+    partials,
+    x0,
+    blocks=1,
+    selection="cyclic",
+    max_iterations_count=100000,
+    initial_step=1,
+    eps=None,
+    Q=None,
+    seed=None,
+    iteration_callback=None,
+):
+    """Find an approximation of a minimum of a function by changing one
+    block of coordinates per step, along the partial derivatives of the
+    function over the block.
+
+    Arguments:
+    'partials' — a list of functions of x, the i-th one returning the
+    partial derivative of f over x_i (as grad_from_hessian of
+    ./quadratic_assignment.py gives), or a function from (x, block),
+    where block is an array of indices, returning the partial
+    derivatives over them
+    'x0' — initial guess
+
+    Keyword arguments:
+
+    'blocks' — a list of arrays of indices of coordinates, or a number
+    of consecutive coordinates in a block. Default is 1 — a coordinate
+    per block.
+
+    'selection' — "cyclic" (default) — blocks are taken in turn;
+    "random" — in turn, in a new random order every pass over them.
+
+    'initial_step' — a step of every block at its first update. The step
+    of a block is then found from how its partial derivatives change
+    along the update, as in the Barzilai-Borwein method, and the update
+    is retried with this step if the partial derivatives have grown.
+
+    'eps' — the search stops once the norm of the gradient is less
+    than 'eps', the partial derivatives of every block taken as they
+    were at its last update. Default is 1e-7.
+
+    'Q' — if f is a quadratic function 0.5 (Qx, x) + (b, x) + c, its
+    matrix 'Q'. The gradient is then found by 'partials' at 'x0' only
+    and updated after every step by the columns of 'Q' of the block,
+    and every step minimizes f over the block exactly. A step costs
+    O(n * block size) instead of O(n^2) of the full gradient.
+
+    'seed' — a seed of the random selection.
+
+    'iteration_callback' — a function from (x, iteration_no, block),
+    called with named arguments before every step. x is updated in
+    place, so copy it to keep it. Default is no-op.
+
+    """
+    if eps is None:
+        eps = 1e-7
+    if iteration_callback is None:
+        iteration_callback = lambda **kwargs: ()  # no-op
+    if selection not in ("cyclic", "random"):
+        raise GradDescentException(f"Unknown selection: {selection}")
+
+    x = np.array(x0, dtype=np.float64)
+    n = len(x)
+    if callable(partials):
+        block_grad = partials
+    else:
+        block_grad = lambda x, block: np.array([partials[i](x) for i in block])
+    if np.isscalar(blocks):
+        blocks = [np.arange(i, min(i + blocks, n)) for i in range(0, n, blocks)]
+    else:
+        blocks = [np.asarray(block) for block in blocks]
+
+    # partial derivatives last found, exact for all the blocks if Q is known
+    grad = np.empty_like(x)
+    for block in blocks:
+        grad[block] = block_grad(x, block)
+    if Q is not None:
+        Q = np.asarray(Q, dtype=np.float64)
+        Q_blocks = [Q[np.ix_(block, block)] for block in blocks]
+    steps = np.full(len(blocks), initial_step, dtype=np.float64)
+    # squared norms of partial derivatives of the blocks at their last
+    # visits, all of them found during the last pass over the blocks
+    norms = np.full(len(blocks), np.inf)
+
+    rng = np.random.default_rng(seed)
+    order = np.arange(len(blocks))
+    updated = None  # a block updated at the previous step
+    for iteration_no in range(max_iterations_count):
+        if Q is not None and np.linalg.norm(grad) < eps:
+            break
+        if Q is None and np.sqrt(np.sum(norms)) < eps:
+            break
+
+        if iteration_no % len(blocks) == 0 and selection == "random":
+            order = rng.permutation(len(blocks))
+            if order[0] == updated and len(blocks) > 1:
+                # a pass doesn't start with the block the last one ended
+                # with, so norms of the other blocks stay fresh
+                order[0], order[-1] = order[-1], order[0]
+        k = order[iteration_no % len(blocks)]
+        block = blocks[k]
+        iteration_callback(x=x, iteration_no=iteration_no, block=block)
+
+        if Q is not None:
+            try:
+                d = -np.linalg.solve(Q_blocks[k], grad[block])
+            except np.linalg.LinAlgError:
+                raise GradDescentException("Q is singular on a block")
+            x[block] += d
+            grad += Q[:, block] @ d
+            continue
+
+        if updated is None or updated == k:
+            # nothing else has moved since grad[block] was found
+            g = grad[block]
+        else:
+            g = block_grad(x, block)
+        norms[k] = np.dot(g, g)
+        x_block = x[block]
+        for _ in range(MAX_RETRIES):
+            d = -steps[k] * g
+            x[block] = x_block + d
+            grad[block] = block_grad(x, block)
+            # the curvature of f along d
+            curvature = np.dot(d, grad[block] - g)
+            if curvature > 0:
+                steps[k] = np.dot(d, d) / curvature
+            else:
+                steps[k] /= 2
+            # the step overshot if the partial derivatives have grown
+            if np.dot(grad[block], grad[block]) <= np.dot(g, g):
+                break
+        updated = k
+
+    return x
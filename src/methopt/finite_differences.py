@@ -0,0 +1,127 @@
+import numpy as np
+
+EPS = np.finfo(np.float64).eps
+
+
+class FiniteDifferences:
+    """The gradient and the Hessian of 'f' found by finite differences,
+    for when they aren't known.
+
+    All the points a derivative needs are put as columns of one (n, m)
+    array, and 'f' is first tried on the whole array at once: functions
+    written as expressions of x[0], x[1], ... with numpy arithmetic
+    return m values for it. If 'f' fails or gives something else, it is
+    called on every point, and isn't tried on arrays again.
+
+    'method' — "central" (default) or "forward" differences for the
+    gradient. Steps are chosen for every coordinate from its magnitude,
+    h_i = c * max(|x_i|, 1), with c balancing the truncation and the
+    rounding errors of the method.
+
+    'f_grad' — if the gradient is known, the Hessian is found by central
+    differences of it rather than by second differences of 'f'.
+
+    """
+
+    def __init__(self, f, method="central", f_grad=None):
+        if method not in ("central", "forward"):
+            raise ValueError(f"Unknown finite difference method: {method}")
+
+        self.f = f
+        self.method = method
+        self.f_grad = f_grad
+        self.vectorized = None  # found out on the first evaluation
+
+    def grad(self, x, out=None):
+        if np.ndim(x) == 0:  # a function of a number
+            if self.method == "central":
+                h = _steps(np.float64(x), EPS ** (1 / 3))
+                return (self.f(x + h) - self.f(x - h)) / (2 * h)
+            h = _steps(np.float64(x), EPS ** (1 / 2))
+            return (self.f(x + h) - self.f(x)) / h
+
+        x = np.asarray(x, dtype=np.float64)
+        n = len(x)
+        diag = np.arange(n)
+        if self.method == "central":
+            h = _steps(x, EPS ** (1 / 3))
+            points = _columns(x, 2 * n)
+            points[diag, diag] += h
+            points[diag, n + diag] -= h
+            values = self._evaluate(points)
+            grad = (values[:n] - values[n:]) / (2 * h)
+        else:
+            h = _steps(x, EPS ** (1 / 2))
+            points = _columns(x, n + 1)
+            points[diag, diag] += h
+            values = self._evaluate(points)
+            grad = (values[:n] - values[n]) / h
+
+        if out is None:
+            return grad
+        out[...] = grad
+        return out
+
+    def hessian(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        n = len(x)
+        if self.f_grad is not None:
+            h = _steps(x, EPS ** (1 / 3))
+            H = np.empty((n, n))
+            for i in range(n):
+                e = np.zeros(n)
+                e[i] = h[i]
+                H[:, i] = (self.f_grad(x + e) - self.f_grad(x - e)) / (2 * h[i])
+            return (H + H.T) / 2
+
+        # f(x), f(x +- 2 h_i e_i) for the diagonal and
+        # f(x +- h_i e_i +- h_j e_j) for every i < j
+        h = _steps(x, EPS ** (1 / 4))
+        diag = np.arange(n)
+        iu, ju = np.triu_indices(n, 1)
+        pairs = len(iu)
+        points = _columns(x, 1 + 2 * n + 4 * pairs)
+        points[diag, 1 + diag] += 2 * h
+        points[diag, 1 + n + diag] -= 2 * h
+        offset = 1 + 2 * n
+        for k, (sign_i, sign_j) in enumerate(((1, 1), (1, -1), (-1, 1), (-1, -1))):
+            columns = offset + k * pairs + np.arange(pairs)
+            points[iu, columns] += sign_i * h[iu]
+            points[ju, columns] += sign_j * h[ju]
+        values = self._evaluate(points)
+
+        H = np.empty((n, n))
+        second_differences = values[1 : 1 + n] - 2 * values[0] + values[1 + n : offset]
+        H[diag, diag] = second_differences / (4 * h * h)
+        pp, pm, mp, mm = values[offset:].reshape(4, pairs)
+        H[iu, ju] = (pp - pm - mp + mm) / (4 * h[iu] * h[ju])
+        H[ju, iu] = H[iu, ju]
+        return H
+
+    def _evaluate(self, points):
+        """Values of f at the columns of 'points'"""
+        m = points.shape[1]
+        if self.vectorized is not False:
+            try:
+                values = np.asarray(self.f(points), dtype=np.float64)
+            except (TypeError, ValueError, IndexError):
+                values = None
+            if self.vectorized is None:
+                self.vectorized = (
+                    values is not None
+                    and values.shape == (m,)
+                    and np.isclose(values[0], self.f(points[:, 0]))
+                )
+            if self.vectorized:
+                return values
+        return np.array([self.f(points[:, i]) for i in range(m)], dtype=np.float64)
+
+
+def _steps(x, c):
+    h = c * np.maximum(np.abs(x), 1)
+    # make x + h exactly representable, so that the step is what it is
+    return (x + h) - x
+
+
+def _columns(x, m):
+    return np.repeat(x[:, np.newaxis], m, axis=1)
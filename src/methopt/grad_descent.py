@@ -1,6 +1,14 @@
+from functools import partial
+from time import perf_counter
+
 import numpy as np
 
 import methopt.step_adjustment_strategy as strat
+from methopt.finite_differences import FiniteDifferences
+from methopt.utils import IterationState, LastPointOracle, Telemetry
+
+# the step of "nesterov" may exceed the previous one at most by this factor
+NESTEROV_STEP_GROWTH = 1.25
 
 
 def grad_descent(
@@ -13,13 +21,20 @@ def grad_descent(
     eps=None,
     stopping_criterion=None,
     iteration_callback=None,
+    Q=None,
+    f_and_grad=None,
+    acceleration=None,
+    momentum=None,
+    in_place=False,
+    telemetry=False,
     **kwargs,
 ):
     """Find an approximation of a local minimum of the function.
 
     Arguments:
     'f' — a diffentiable, (locally) convex function to find minumum of
-    'f_grad' — a gradient of 'f'
+    'f_grad' — a gradient of 'f', or None to find it by central
+    differences, see ./finite_differences.py
     'x0' — initial guess, does not need to be correct
 
     Keyword arguments:
@@ -29,8 +44,12 @@ def grad_descent(
 
     'step_adjustment_strategy' — a name of a strategy or an object of
     strategy that adjusts a gradient step on every
-    iteration. Available strategies can be found in
-    ./step_adjustment_strategy.py
+    iteration. Available names are "divide_step", "backtracking",
+    "barzilai_borwein", "nonmonotone" and "quadratic" (requires
+    'Q'). Available strategies can be found in
+    ./step_adjustment_strategy.py. A strategy object made with 'f' and
+    'f_grad' calls them through the cache of 'f_and_grad' below during
+    the search, so its calls are shared and counted with the others.
 
     'intial_step' — an initial gradient step.
 
@@ -43,6 +62,46 @@ def grad_descent(
     function values is smaller than 'eps', "n_iterations" — stop after
     'max_iterations_count' iterations. Default is "argument_margin".
 
+    'Q' — if 'f' is a quadratic function 0.5 (Qx, x) + (b, x) + c, its
+    matrix 'Q' (or a function computing Q @ v). With
+    step_adjustment_strategy="quadratic" the step is then found exactly
+    with one product by 'Q' per iteration.
+
+    'f_and_grad' — a function returning a pair (f(x), f_grad(x)), for
+    when the two share work. If it's given, 'f' and 'f_grad' may be
+    None. Either way 'f' and 'f_grad' are evaluated at most once per
+    point in a row, see LastPointOracle in ./utils.py
+
+    'acceleration' — a name of a momentum scheme to add to the
+    gradient steps. "heavy_ball" — Polyak's heavy ball, x_new = x -
+    step * grad(x) + 'momentum' * (x - x_prev), 'momentum' is 0.9 by
+    default; the momentum is left out of a step where it makes f grow,
+    which costs a call of 'f' per iteration. "nesterov" — Nesterov's
+    accelerated gradient (FISTA): the gradient step is taken from
+    y = x + (t_prev - 1) / t * (x - x_prev); the step is the larger of
+    the one proposed by the strategy and 1.25 times the previous one,
+    halved until f(y - step * grad) <= f(y) - step / 2 |grad|^2, as the
+    method requires, and t grows slower to allow for the larger steps.
+    "nesterov_restart" — the same, but t starts over once f grows or
+    the step goes against the gradient at y (the adaptive restart of
+    O'Donoghue and Candes), which costs a call of 'f' per iteration.
+    The steps are still found by 'step_adjustment_strategy'. Default is
+    None, plain gradient descent.
+
+    'in_place' — if set, points and gradients are kept in buffers
+    allocated once, and 'f_grad' is called as f_grad(x, out=buffer) to
+    write the gradient into one (it is still called without 'out' by
+    strategies that need the gradient elsewhere). Strategies may keep a
+    point or a gradient till the next iteration, so there are two
+    buffers of each, reused every other iteration; 'iteration_callback'
+    is given the buffers too. Can't be used with 'acceleration'.
+
+    'telemetry' — if set, a SolverResult (see ./utils.py) is returned
+    instead of the point: the point, f at it, counts of iterations and
+    calls, why the search stopped and the time spent finding steps
+    ("strategy") and updating the point ("update"). Nothing is timed
+    otherwise.
+
     'iteration_callback' — a function from (x, iteration_no) where x
     is a point in the search space at the current iteration
     #iteration_no. Please note that the function is going to be called
@@ -53,44 +112,271 @@ def grad_descent(
 
     Note that we use **kwargs to ignore arguments that we don't need.
 
+    """
+    recorder = Telemetry() if telemetry else None
+    x = x0
+    for state in iter_grad_descent(
+        f,
+        f_grad,
+        x0,
+        max_iterations_count=max_iterations_count,
+        step_adjustment_strategy=step_adjustment_strategy,
+        initial_step=initial_step,
+        eps=eps,
+        stopping_criterion=stopping_criterion,
+        iteration_callback=iteration_callback,
+        Q=Q,
+        f_and_grad=f_and_grad,
+        acceleration=acceleration,
+        momentum=momentum,
+        in_place=in_place,
+        telemetry=recorder,
+    ):
+        x = state.x
+    if recorder is not None:
+        return recorder.result(x)
+    return x
+
+
+def iter_grad_descent(
+    f,
+    f_grad,
+    x0,
+    max_iterations_count=1000,
+    step_adjustment_strategy="divide_step",
+    initial_step=1,
+    eps=None,
+    stopping_criterion=None,
+    iteration_callback=None,
+    Q=None,
+    f_and_grad=None,
+    acceleration=None,
+    momentum=None,
+    in_place=False,
+    telemetry=None,
+    **kwargs,
+):
+    """The same as grad_descent, but a generator that yields an
+    IterationState (see ./utils.py) after every iteration, so the search
+    can be paused or abandoned at any iteration. The x of the last state
+    is the point found; if none is yielded, it's 'x0'.
+
+    'telemetry' — a Telemetry (see ./utils.py) to record the run in.
+
     """
 
     if eps is None:
         eps = 1e-7
 
+    given = f, f_grad  # strategies made with them are routed to the oracle
+    if f_grad is None and f_and_grad is None:
+        f_grad = FiniteDifferences(f).grad
+    oracle = LastPointOracle(f, f_grad, f_and_grad)
+    f, f_grad = oracle.f, oracle.grad
+    if telemetry is not None:
+        telemetry.oracle = oracle
+
     if step_adjustment_strategy == "divide_step":
         step_adjustment_strategy = strat.DivideStepStrategy(f, f_grad, eps=eps)
+    elif step_adjustment_strategy == "backtracking":
+        step_adjustment_strategy = strat.BacktrackingStrategy(f, f_grad, eps=eps)
+    elif step_adjustment_strategy == "barzilai_borwein":
+        step_adjustment_strategy = strat.BarzilaiBorweinStrategy(f, f_grad, eps=eps)
+    elif step_adjustment_strategy == "nonmonotone":
+        step_adjustment_strategy = strat.NonmonotoneStrategy(f, f_grad, eps=eps)
+    elif step_adjustment_strategy == "quadratic":
+        if Q is None:
+            raise GradDescentException('The "quadratic" strategy requires Q')
+        step_adjustment_strategy = strat.QuadraticStrategy(f, f_grad, Q, eps=eps)
     elif not isinstance(step_adjustment_strategy, strat.StepAdjustmentStrategy):
         raise GradDescentException(
             f"Unknown step adjustment strategy: {step_adjustment_strategy}"
         )
 
     if stopping_criterion is None or stopping_criterion == "argument_margin":
-        is_finished = lambda x, x_new: np.linalg.norm(x - x_new) < eps
+        is_finished = lambda context, x_new: np.linalg.norm(context.x - x_new) < eps
     elif stopping_criterion == "function_margin":
-        is_finished = lambda x, x_new: abs(f(x) - f(x_new)) < eps
+        # f(x) was found by the strategy, f(x_new) is reused next iteration
+        is_finished = lambda context, x_new: abs(context.fx - f(x_new)) < eps
     elif stopping_criterion == "n_iterations":
         # we do "max_iterations_count" anyway
-        is_finished = lambda x, x_new: False
+        is_finished = lambda context, x_new: False
     else:
         raise GradDescentException(f"Unknown stopping_criterion: {stopping_criterion}")
 
     if iteration_callback is None:
         iteration_callback = lambda **kwargs: ()  # no-op
 
-    x = x0
-    step_prev = initial_step
-    for iteration_no in range(max_iterations_count):
-        iteration_callback(x=x, iteration_no=iteration_no)
-        step = step_adjustment_strategy(x, step_prev, iteration_no)
-        assert step >= 0
-        x_new = x - step * f_grad(x)
+    if acceleration not in (None, "heavy_ball", "nesterov", "nesterov_restart"):
+        raise GradDescentException(f"Unknown acceleration: {acceleration}")
+    if momentum is None:
+        momentum = 0.9
+    nesterov = acceleration in ("nesterov", "nesterov_restart")
 
-        if is_finished(x, x_new):
+    with strat.evaluated_by(step_adjustment_strategy, oracle, *given):
+        step_adjustment_strategy.reset()
+        x = x0
+        if in_place:
+            if acceleration is not None:
+                raise GradDescentException("in_place can't be used with acceleration")
+            x = np.array(x0, dtype=np.float64)
+            x_buffers = (x, np.empty_like(x))
+            grad_buffers = (np.empty_like(x), np.empty_like(x))
+            if stopping_criterion in (None, "argument_margin"):
+                # x - x_new is step * grad, no need to subtract
+                is_finished = lambda context, x_new: step * np.linalg.norm(grad) < eps
+        x_prev = x
+        y = x  # the point to take a gradient step from
+        t = 1
+        f_x = f(x0) if acceleration == "nesterov_restart" else None
+        step_prev = initial_step
+        for iteration_no in range(max_iterations_count):
+            iteration_callback(x=x, iteration_no=iteration_no)
+            if in_place:
+                grad_out = grad_buffers[iteration_no % 2]
+                context = strat.EvaluationContext(f, partial(f_grad, out=grad_out), y)
+            else:
+                context = strat.EvaluationContext(f, f_grad, y)
+            if telemetry is not None:
+                started = perf_counter()
+            step = step_adjustment_strategy(y, step_prev, iteration_no, context=context)
+            assert step >= 0
+            if telemetry is not None:
+                telemetry.add_time("strategy", started)
+                telemetry.iterations = iteration_no + 1
+                started = perf_counter()
+            grad = context.grad
+            if nesterov:
+                if iteration_no > 0:
+                    # strategies scaling the step by the gradient at y shrink
+                    # it for good once the momentum has grown the gradient,
+                    # so the step is let grow back
+                    step = max(step, NESTEROV_STEP_GROWTH * step_prev)
+                # FISTA needs f(y - step * grad) <= f(y) - step / 2 |grad|^2,
+                # the step is halved until it holds (Beck and Teboulle)
+                grad_norm2 = np.dot(grad, grad)
+                while (
+                    f(y - step * grad) > context.fx - step / 2 * grad_norm2
+                    and step > eps
+                ):
+                    step /= 2
+            if in_place:
+                x_new = x_buffers[(iteration_no + 1) % 2]
+                np.multiply(grad, -step, out=x_new)
+                x_new += y
+            else:
+                x_new = y - step * grad
+            if acceleration == "heavy_ball":
+                # the momentum is dropped where it makes f grow
+                x_momentum = x_new + momentum * (x - x_prev)
+                if f(x_momentum) <= context.fx:
+                    x_new = x_momentum
+
+            if nesterov:
+                # the criterion is about the iterates, not the extrapolated points
+                context = strat.EvaluationContext(f, f_grad, x)
+            if is_finished(context, x_new):
+                if telemetry is not None:
+                    telemetry.add_time("update", started)
+                    telemetry.termination = "converged"
+                break
+
+            step_prev = step
+            if acceleration == "nesterov_restart":
+                f_new = f(x_new)
+                if np.dot(grad, x_new - x) > 0 or f_new > f_x:
+                    t = 1
+                f_x = f_new
+            if nesterov:
+                # the next step may be larger, t grows slower to make up
+                # for it, as FISTA with backtracking of Scheinberg, Goldfarb
+                # and Bai does
+                t_new = (1 + np.sqrt(1 + 4 * t ** 2 / NESTEROV_STEP_GROWTH)) / 2
+                y = x_new + (t - 1) / t_new * (x_new - x)
+                t = t_new
+            else:
+                y = x_new
+            x_prev = x
+            x = x_new
+            if telemetry is not None:
+                telemetry.add_time("update", started)
+            yield IterationState(oracle, x, iteration_no, step)
+
+
+def grad_descent_batch(
+    f,
+    f_grad,
+    x0,
+    max_iterations_count=1000,
+    initial_step=1,
+    eps=None,
+    stopping_criterion=None,
+    iteration_callback=None,
+):
+    """Run grad_descent from every row of a (k, n) array 'x0' at once.
+
+    'f' and 'f_grad' are called on a (m, n) array of points, one per
+    row, and return a (m,) array of values and a (m, n) array of
+    gradients. Every row has its own gradient step, adjusted as with
+    the "divide_step" strategy, and drops out of the computation once
+    it has converged: 'f' and 'f_grad' only see the rows still running.
+    The value of 'f' at the accepted step is kept for the next iteration.
+
+    Other arguments are the same as in grad_descent. 'iteration_callback'
+    is also given 'active', a mask of the rows still running.
+
+    Returns a (k, n) array of the points found.
+
+    """
+    if eps is None:
+        eps = 1e-7
+    if stopping_criterion is None:
+        stopping_criterion = "argument_margin"
+    if stopping_criterion not in ("argument_margin", "function_margin", "n_iterations"):
+        raise GradDescentException(f"Unknown stopping_criterion: {stopping_criterion}")
+    if iteration_callback is None:
+        iteration_callback = lambda **kwargs: ()  # no-op
+
+    x = np.array(x0, dtype=np.float64)
+    if x.ndim != 2:
+        raise GradDescentException("x0 must be a (k, n) array of starting points")
+    steps = np.full(len(x), initial_step, dtype=np.float64)
+    active = np.ones(len(x), dtype=bool)
+    # f at the accepted step of a row is its f(x) on the next iteration
+    f_values = f(x)
+
+    for iteration_no in range(max_iterations_count):
+        if not np.any(active):
             break
+        iteration_callback(x=x, iteration_no=iteration_no, active=active)
+        rows = np.flatnonzero(active)
+        x_rows = x[rows]
+        grad = f_grad(x_rows)
+        fx = f_values[rows]
+
+        step = steps[rows]
+        if iteration_no % 100 == 0:  # try bigger step
+            step *= 256
+        x_new = x_rows - step[:, np.newaxis] * grad
+        f_new = f(x_new)
+        halving = (f_new >= fx) & (step > eps)
+        while np.any(halving):
+            step[halving] /= 2
+            x_new[halving] = x_rows[halving] - step[halving, np.newaxis] * grad[halving]
+            f_new[halving] = f(x_new[halving])
+            halving &= (f_new >= fx) & (step > eps)
+
+        if stopping_criterion == "argument_margin":
+            finished = np.linalg.norm(x_rows - x_new, axis=1) < eps
+        elif stopping_criterion == "function_margin":
+            finished = np.abs(fx - f_new) < eps
+        else:
+            finished = np.zeros(len(rows), dtype=bool)
 
-        step_prev = step
-        x = x_new
+        steps[rows] = step
+        x[rows[~finished]] = x_new[~finished]
+        f_values[rows[~finished]] = f_new[~finished]
+        active[rows[finished]] = False
 
     return x
 
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from methopt.conjugate_direction_method import (
+    conjugate_direction_method,
+    iter_conjugate_direction_method,
+)
+from methopt.grad_descent import grad_descent, iter_grad_descent
+from methopt.newtons_method import iter_newtons_method, newtons_method
+from methopt.quasi_newton import bfgs, iter_bfgs, iter_lbfgs, lbfgs
+from methopt.utils import Telemetry
+
+# solvers and their names to the generators that run them
+SOLVERS = {
+    grad_descent: iter_grad_descent,
+    "grad_descent": iter_grad_descent,
+    conjugate_direction_method: iter_conjugate_direction_method,
+    "conjugate_direction_method": iter_conjugate_direction_method,
+    newtons_method: iter_newtons_method,
+    "newtons_method": iter_newtons_method,
+    bfgs: iter_bfgs,
+    "bfgs": iter_bfgs,
+    lbfgs: iter_lbfgs,
+    "lbfgs": iter_lbfgs,
+}
+
+
+def multistart(method, f, f_grad, x0s, workers=None, target=None, **kwargs):
+    """Run 'method' from every point of 'x0s' in a pool of processes and
+    yield pairs (i, result) as the runs finish, where result is a
+    SolverResult (see ./utils.py) of the run from x0s[i].
+
+    'method' — grad_descent, conjugate_direction_method,
+    newtons_method, bfgs or lbfgs, or a name of one of them. Other
+    keyword arguments are passed to it, 'f_H' of newtons_method among
+    them.
+
+    'workers' — a number of processes, default is the number of CPUs.
+
+    'target' — once a run ends with f(x) <= 'target', its result is the
+    last one yielded: the runs that haven't started are cancelled, and
+    the running ones stop at their next iteration (with termination
+    "cancelled"). The same happens if the caller stops iterating.
+
+    Where processes can be forked (Linux), 'f', 'f_grad' and the other
+    arguments are inherited by them, so they may be lambdas. Otherwise
+    they must be picklable.
+
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"Unknown method: {method}")
+    if workers is None:
+        workers = os.cpu_count()
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    stop = context.Event()
+    problem = (SOLVERS[method], f, f_grad, kwargs, stop)
+
+    with ProcessPoolExecutor(
+        workers, mp_context=context, initializer=_set_problem, initargs=(problem,)
+    ) as executor:
+        futures = [executor.submit(_solve, i, x0) for i, x0 in enumerate(x0s)]
+        try:
+            for future in as_completed(futures):
+                i, result = future.result()
+                yield i, result
+                if target is not None and result.fx <= target:
+                    break
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+
+
+_problem = None
+
+
+def _set_problem(problem):
+    global _problem
+    _problem = problem
+
+
+def _solve(i, x0):
+    solver, f, f_grad, kwargs, stop = _problem
+    x0 = np.array(x0, dtype=np.float64)
+    telemetry = Telemetry()
+    if solver is iter_newtons_method:
+        kwargs = dict(kwargs)
+        f_H = kwargs.pop("f_H", None)
+        states = solver(f, f_H, f_grad, x0, telemetry=telemetry, **kwargs)
+    else:
+        states = solver(f, f_grad, x0, telemetry=telemetry, **kwargs)
+
+    x = x0
+    for state in states:
+        x = state.x
+        if stop.is_set():
+            telemetry.termination = "cancelled"
+            break
+    return i, telemetry.result(np.copy(x))
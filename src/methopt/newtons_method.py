@@ -1,15 +1,21 @@
+from time import perf_counter
+
 import numpy as np
 
 from methopt.conjugate_direction_method import conjugate_direction_method_for_quadratic
+from methopt.finite_differences import FiniteDifferences
+from methopt.utils import IterationState, LastPointOracle, Telemetry
 
 
 class DivideStepStrategy:
-    def __init__(self, f, eps=None):
+    def __init__(self, f, eps=None, in_place=False):
         if eps is None:
             eps = 1e-7
 
         self.f = f
         self.eps = eps
+        self.in_place = in_place
+        self._x_new = None
 
     def __call__(self, x, x_wave, step_prev, iteration_no):
         if iteration_no % 100 == 0:
@@ -17,14 +23,93 @@ class DivideStepStrategy:
         else:
             step = step_prev
 
-        x_new = x + step * x_wave
+        x_new = self._trial_point(x, x_wave, step)
         fx = self.f(x)
         while self.f(x_new) >= fx and step > self.eps:
             step /= 2
-            x_new = x + step * x_wave
+            x_new = self._trial_point(x, x_wave, step)
 
         return step
 
+    def _trial_point(self, x, x_wave, step):
+        if not self.in_place:
+            return x + step * x_wave
+        if self._x_new is None or self._x_new.shape != np.shape(x):
+            self._x_new = np.empty(np.shape(x), dtype=np.float64)
+        np.multiply(x_wave, step, out=self._x_new)
+        self._x_new += x
+        return self._x_new
+
+
+class CholeskyDirection:
+    """Newton directions -H^-1 grad found by the Cholesky factorization
+    H = L L^T and two triangular solves.
+
+    The factor is cached: while a Hessian differs from the factored one
+    by no more than 'tol' of its norm (0 by default, that is while it is
+    the same), only the O(n^2) solves are done for a new gradient, and
+    the O(n^3) factorization is skipped.
+
+    If H isn't positive definite, H + tau I is factored instead, with tau
+    growing until the factorization succeeds (a modified Cholesky
+    factorization, Nocedal and Wright, algorithm 3.3), so that the
+    direction is still a descent one.
+
+    """
+
+    def __init__(self, tol=None):
+        if tol is None:
+            tol = 0
+
+        self.tol = tol
+        self.factorizations = 0
+        self._H = None
+        self._L = None
+        self._L_T = None
+        self._y = None
+
+    def __call__(self, H, grad, out=None):
+        H = np.asarray(H, dtype=np.float64)
+        if not self._is_factored(H):
+            self._L = _modified_cholesky(H)
+            self._L_T = np.ascontiguousarray(self._L.T)
+            self._H = np.copy(H)
+            self.factorizations += 1
+
+        n = len(grad)
+        if self._y is None or len(self._y) != n:
+            self._y = np.empty(n, dtype=np.float64)
+        if out is None:
+            out = np.empty(n, dtype=np.float64)
+        # L y = -grad, L^T out = y
+        L, L_T, y = self._L, self._L_T, self._y
+        for i in range(n):
+            y[i] = (-grad[i] - np.dot(L[i, :i], y[:i])) / L[i, i]
+        for i in reversed(range(n)):
+            out[i] = (y[i] - np.dot(L_T[i, i + 1 :], out[i + 1 :])) / L[i, i]
+        return out
+
+    def _is_factored(self, H):
+        if self._H is None or self._H.shape != H.shape:
+            return False
+        return np.linalg.norm(H - self._H) <= self.tol * np.linalg.norm(self._H)
+
+
+def _modified_cholesky(H, beta=1e-3):
+    try:
+        return np.linalg.cholesky(H)
+    except np.linalg.LinAlgError:
+        pass
+
+    min_diagonal = np.min(np.diag(H))
+    tau = beta if min_diagonal > 0 else beta - min_diagonal
+    identity = np.eye(len(H))
+    while True:
+        try:
+            return np.linalg.cholesky(H + tau * identity)
+        except np.linalg.LinAlgError:
+            tau = max(2 * tau, beta)
+
 
 def newtons_method(
     f,
@@ -35,31 +120,133 @@ def newtons_method(
     iteration_callback=None,
     eps=1e-7,
     initial_step=1,
+    f_and_grad=None,
+    in_place=False,
+    linear_solver="cholesky",
+    hessian_tol=None,
+    telemetry=False,
 ):
+    # The Newton direction is found by 'linear_solver', "cholesky" — see
+    # CholeskyDirection, 'hessian_tol' is its 'tol', or
+    # "conjugate_directions" — by conjugate_direction_method_for_quadratic
+    # from 'x0'.
+    # With 'telemetry' a SolverResult (see ./utils.py) is returned
+    # instead of the point, with the time spent on finding the Newton
+    # direction ("direction"), the step ("strategy") and on updating
+    # the point ("update").
+    recorder = Telemetry() if telemetry else None
+    x = x0
+    for state in iter_newtons_method(
+        f,
+        f_H,
+        f_grad,
+        x0,
+        max_iterations_count=max_iterations_count,
+        iteration_callback=iteration_callback,
+        eps=eps,
+        initial_step=initial_step,
+        f_and_grad=f_and_grad,
+        in_place=in_place,
+        linear_solver=linear_solver,
+        hessian_tol=hessian_tol,
+        telemetry=recorder,
+    ):
+        x = state.x
+    if recorder is not None:
+        return recorder.result(x)
+    return x
+
+
+def iter_newtons_method(
+    f,
+    f_H,
+    f_grad,
+    x0,
+    max_iterations_count=1000,
+    iteration_callback=None,
+    eps=1e-7,
+    initial_step=1,
+    f_and_grad=None,
+    in_place=False,
+    linear_solver="cholesky",
+    hessian_tol=None,
+    telemetry=None,
+):
+    # The same as newtons_method, but yields an IterationState (see
+    # ./utils.py) after every iteration and records the run in
+    # 'telemetry', a Telemetry, if it's given.
+    # Without 'f_H' or 'f_grad' they are found by finite differences, see
+    # ./finite_differences.py
+    # With 'in_place' points and the gradient are kept in buffers
+    # allocated once, 'f_grad' is called as f_grad(x, out=buffer) and
+    # 'iteration_callback' is given the buffers.
     if iteration_callback is None:
         iteration_callback = lambda **kwargs: ()
+    if linear_solver not in ("cholesky", "conjugate_directions"):
+        raise ValueError(f"Unknown linear solver: {linear_solver}")
+
+    grad_is_known = f_grad is not None or f_and_grad is not None
+    if not grad_is_known:
+        f_grad = FiniteDifferences(f).grad
+    # f(x_prev) is the value at the step accepted on the previous iteration
+    oracle = LastPointOracle(f, f_grad, f_and_grad)
+    f, f_grad = oracle.f, oracle.grad
+    if f_H is None:
+        f_H = FiniteDifferences(f, f_grad=f_grad if grad_is_known else None).hessian
+    if telemetry is not None:
+        telemetry.oracle = oracle
 
-    step_adjustment_strategy = DivideStepStrategy(f, eps)
+    step_adjustment_strategy = DivideStepStrategy(f, eps, in_place)
+    direction = CholeskyDirection(hessian_tol)
+    x_wave = None
     step_prev = initial_step
-    f_prev = f(x0)
     x_prev = x0
+    if in_place:
+        x_prev = np.array(x0, dtype=np.float64)
+        x_buffers = (x_prev, np.empty_like(x_prev))
+        grad = np.empty_like(x_prev)
     iteration_callback(x=x0, iteration_no=0)
     for k in range(1, max_iterations_count):
         # psi(x) = (H(x_prev)(x - x_prev),x - x_prev)
         #        + (grad(x_prev), x - x_prev) + f(x_prev)
         # f(x_prev) doesn't affect min's coordinates
         # min(psi(x)) = x_wave + x_prev
-        x_wave = conjugate_direction_method_for_quadratic(
-            f_H(x_prev), f_grad(x_prev), x0
-        )
+        if telemetry is not None:
+            started = perf_counter()
+        if in_place:
+            f_grad(x_prev, out=grad)
+        else:
+            grad = f_grad(x_prev)
+        if linear_solver == "cholesky":
+            x_wave = direction(f_H(x_prev), grad, out=x_wave if in_place else None)
+        else:
+            x_wave = conjugate_direction_method_for_quadratic(
+                f_H(x_prev), grad, x0, in_place=in_place
+            )
+        if telemetry is not None:
+            telemetry.hessian_calls += 1
+            telemetry.add_time("direction", started)
+            started = perf_counter()
         step = step_adjustment_strategy(x_prev, x_wave, step_prev, k)
+        if telemetry is not None:
+            telemetry.add_time("strategy", started)
+            telemetry.iterations = k
+            started = perf_counter()
         # xk = x_prev + step((x_wave + x_prev) - x_prev)
-        xk = x_prev + step * x_wave
+        if in_place:
+            xk = x_buffers[k % 2]
+            np.multiply(x_wave, step, out=xk)
+            xk += x_prev
+        else:
+            xk = x_prev + step * x_wave
+        if telemetry is not None:
+            telemetry.add_time("update", started)
         iteration_callback(x=xk, iteration_no=k)
-        fk = f(xk)
-        if np.linalg.norm(x_prev - xk) < eps:
-            return xk
+        yield IterationState(oracle, xk, k, step)
+        # x_prev - xk is step * x_wave
+        if step * np.linalg.norm(x_wave) < eps:
+            if telemetry is not None:
+                telemetry.termination = "converged"
+            return
         x_prev = xk
-        f_prev = fk
         step_prev = step
-    return x_prev
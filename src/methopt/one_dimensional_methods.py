@@ -1,18 +1,95 @@
+import math
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
 PHI = (1 + 5 ** 0.5) / 2
-FIBONACCI_MAX_STEPS = 52
 
 # For each method:
 # f: R -> R - continuous and unimodal on the start segment [a0, b0]
+# 'max_function_calls' — f is never called more than that many times,
+# a method stops before a call that would exceed it
+# 'cache' — an EvaluationCache to look values of f up in, pass the same
+# one to several runs over the same f to share values between them
+
+
+# A bounded LRU cache of values of f keyed by the argument
+class EvaluationCache:
+    def __init__(self, max_size=None):
+        if max_size is None:
+            max_size = 128
+
+        self.max_size = max_size
+        self._values = OrderedDict()
+
+    def __contains__(self, x):
+        return x in self._values
+
+    def items(self):
+        return self._values.items()
+
+    def __getitem__(self, x):
+        self._values.move_to_end(x)
+        return self._values[x]
+
+    def __setitem__(self, x, value):
+        self._values[x] = value
+        self._values.move_to_end(x)
+        if len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+
+# Calls f through 'cache' and counts the calls that actually reach f,
+# so that a method knows when 'max_function_calls' is used up
+class Evaluations:
+    def __init__(self, f, max_function_calls=None, cache=None):
+        if cache is None:
+            cache = EvaluationCache()
+
+        self.f = f
+        self.max_function_calls = max_function_calls
+        self.cache = cache
+        self.calls = 0
+
+    def has_budget(self, n=1):
+        return (
+            self.max_function_calls is None or self.calls + n <= self.max_function_calls
+        )
+
+    def __call__(self, x):
+        if x in self.cache:
+            return self.cache[x]
+        value = self.f(x)
+        self.calls += 1
+        self.cache[x] = value
+        return value
+
+    def map(self, xs, executor):
+        values = {x: self.cache[x] for x in xs if x in self.cache}
+        missing = [x for x in dict.fromkeys(xs) if x not in values]
+        for x, value in zip(missing, executor.map(self.f, missing)):
+            self.calls += 1
+            self.cache[x] = value
+            values[x] = value
+        return [values[x] for x in xs]
 
 
 # On each iteration |b - a| ~ |b_previous - a_previous| / 2
 # Iterations will be ~ log2(|b0 - a0| / eps)
 # Each iteration calls f twice
 # Returns x*, number of iterations, number of calls f
-def dichotomy(eps, a, b, f, max_steps):
+# If 'history' is a list, (a, b, number of calls f) is appended to it
+# before the first and after every iteration, see sweep_epsilons
+def dichotomy(
+    eps, a, b, f, max_steps, history=None, max_function_calls=None, cache=None
+):
+    f = Evaluations(f, max_function_calls, cache)
     sigma = 1e-8
     iterations = 0
-    while abs(b - a) > 2 * eps and iterations < max_steps:
+    if history is not None:
+        history.append((a, b, 0))
+    while abs(b - a) > 2 * eps and iterations < max_steps and f.has_budget(2):
         x = (a + b) / 2
         x1 = x - sigma
         x2 = x + sigma
@@ -23,10 +100,11 @@ def dichotomy(eps, a, b, f, max_steps):
         else:
             a = x1
         iterations += 1
+        if history is not None:
+            history.append((a, b, f.calls))
 
     x = (a + b) / 2
-    function_calls = iterations * 2
-    return x, iterations, function_calls
+    return x, iterations, f.calls
 
 
 # |b1 - a1| = |b0 - a0| / PHI
@@ -34,13 +112,23 @@ def dichotomy(eps, a, b, f, max_steps):
 # Iterations will be ~ 1 / log_0.7(2 * |b0 - a0| / eps)
 # Each iteration calls f once
 # Returns x*, number of iterations, number of calls f
-def golden_section(eps, a, b, f, max_steps):
+# 'history' is the same as in dichotomy
+def golden_section(
+    eps, a, b, f, max_steps, history=None, max_function_calls=None, cache=None
+):
+    f = Evaluations(f, max_function_calls, cache)
     x1 = b - (b - a) / PHI
     x2 = a + (b - a) / PHI
     iterations = 0
     know_f1 = True
+    if not f.has_budget():
+        if history is not None:
+            history.append((a, b, f.calls))
+        return (a + b) / 2, iterations, f.calls
     f_old = f(x1)
-    while abs(b - a) > 2 * eps and iterations < max_steps:
+    if history is not None:
+        history.append((a, b, f.calls))
+    while abs(b - a) > 2 * eps and iterations < max_steps and f.has_budget():
         iterations += 1
         if know_f1:
             f1 = f_old
@@ -62,39 +150,217 @@ def golden_section(eps, a, b, f, max_steps):
             know_f1 = True
             f_old = f2
         else:
+            if history is not None:
+                history.append((a, b, f.calls))
             break
+        if history is not None:
+            history.append((a, b, f.calls))
 
     x = (a + b) / 2
-    return x, iterations, iterations + 1
+    return x, iterations, f.calls
+
+
+# k equidistant points of [a, b] are evaluated concurrently, the segment
+# shrinks to the neighbours of the best one:
+# |b_k - a_k| = |b_(k - 1) - a_(k - 1)| * 2 / (k + 1)
+# 'executor' — a concurrent.futures executor to evaluate f on, by default
+# a thread pool with k workers. Pass a process pool when f holds the GIL
+# Each iteration calls f at most k times
+# Returns x*, number of iterations, number of calls f
+def k_section(
+    eps, a, b, f, max_steps, k=4, executor=None, max_function_calls=None, cache=None
+):
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=k) as executor:
+            return k_section(
+                eps, a, b, f, max_steps, k, executor, max_function_calls, cache
+            )
+
+    f = Evaluations(f, max_function_calls, cache)
+    iterations = 0
+    while abs(b - a) > 2 * eps and iterations < max_steps and f.has_budget(k):
+        points = [a + i * (b - a) / (k + 1) for i in range(k + 2)]
+        values = f.map(points[1:-1], executor)
+        best = values.index(min(values)) + 1
+        a, b = points[best - 1], points[best + 1]
+        iterations += 1
+
+    x = (a + b) / 2
+    return x, iterations, f.calls
+
+
+# Runs 'method' (dichotomy or golden_section) once with the smallest of
+# 'epsilons' and restores the results for the others from its history:
+# a run with a bigger eps is a prefix of the run with a smaller one.
+# fibonacci_method and brent choose their points depending on eps, so
+# they can't be swept this way
+# Returns a dict eps -> (x*, number of iterations, number of calls f)
+def sweep_epsilons(method, epsilons, a, b, f, max_steps):
+    history = []
+    method(min(epsilons), a, b, f, max_steps, history=history)
+
+    results = {}
+    for eps in epsilons:
+        iterations = next(
+            (i for i, (a, b, _) in enumerate(history) if abs(b - a) <= 2 * eps),
+            len(history) - 1,
+        )
+        a, b, function_calls = history[iterations]
+        results[eps] = (a + b) / 2, iterations, function_calls
+    return results
 
 
-def find_n(len_ab, eps, fibonacci, max_steps):
-    left = 0
-    right = max_steps
-    while right - left > 1:
-        m = (left + right) // 2
-        if 2 * len_ab < eps * fibonacci[m]:
-            right = m
+# Golden section with parabolic interpolation: while the parabola through
+# the three best points lands inside the segment and the steps keep
+# shrinking, take its vertex, otherwise make a golden section step.
+# On smooth functions converges superlinearly, never slower than
+# golden_section by more than a constant factor
+# Each iteration calls f once
+# Returns x*, number of iterations, number of calls f
+def brent(eps, a, b, f, max_steps, max_function_calls=None, cache=None):
+    f = Evaluations(f, max_function_calls, cache)
+    ratio = 1 - 1 / PHI
+    x = w = v = a + ratio * (b - a)
+    iterations = 0
+    if not f.has_budget():
+        return x, iterations, f.calls
+    fx = fw = fv = f(x)
+    d = e = 0
+    while iterations < max_steps and f.has_budget():
+        m = (a + b) / 2
+        tol = eps / 2
+        if abs(x - m) <= 2 * tol - (b - a) / 2:
+            break
+        iterations += 1
+
+        parabolic = False
+        if abs(e) > tol:
+            # fit a parabola through x, w and v
+            r = (x - w) * (fx - fv)
+            q = (x - v) * (fx - fw)
+            p = (x - v) * q - (x - w) * r
+            q = 2 * (q - r)
+            if q > 0:
+                p = -p
+            q = abs(q)
+            if abs(p) < abs(q * e / 2) and q * (a - x) < p < q * (b - x):
+                e = d
+                d = p / q
+                u = x + d
+                if u - a < 2 * tol or b - u < 2 * tol:
+                    d = tol if x < m else -tol
+                parabolic = True
+        if not parabolic:
+            e = (b if x < m else a) - x
+            d = ratio * e
+
+        u = x + d if abs(d) >= tol else x + (tol if d > 0 else -tol)
+        fu = f(u)
+        if fu <= fx:
+            if u < x:
+                b = x
+            else:
+                a = x
+            v, w, x = w, x, u
+            fv, fw, fx = fw, fx, fu
         else:
-            left = m
-    return right
+            if u < x:
+                a = u
+            else:
+                b = u
+            if fu <= fw or w == x:
+                v, w = w, u
+                fv, fw = fw, fu
+            elif fu <= fv or v == x or v == w:
+                v = u
+                fv = fu
+
+    return x, iterations, f.calls
+
+
+# Finds a segment [a, b] inside [0, max_x] that contains a minimum of f,
+# starting from a guess x0 > 0. While f(x0) >= f(0) the guess is halved,
+# otherwise it is doubled until f stops decreasing
+# f: R -> R - unimodal on [0, max_x]
+# Returns a, b, number of calls f
+def bracket(f, x0, max_x, eps, max_steps, max_function_calls=None, cache=None):
+    f = Evaluations(f, max_function_calls, cache)
+    x = min(x0, max_x)
+    if not f.has_budget(2):
+        return 0, x, f.calls
+    f_zero = f(0)
+    fx = f(x)
+    steps = 0
+    if fx >= f_zero:
+        right = x
+        while fx >= f_zero and x > eps and steps < max_steps and f.has_budget():
+            right = x
+            x /= 2
+            fx = f(x)
+            steps += 1
+        return 0, right, f.calls
+
+    a = 0
+    while x < max_x and steps < max_steps and f.has_budget():
+        x_new = min(x * 2, max_x)
+        f_new = f(x_new)
+        steps += 1
+        if f_new >= fx:
+            return a, x_new, f.calls
+        a, x, fx = x, x_new, f_new
+    return a, max_x, f.calls
+
+
+# Fibonacci numbers Fib(0) = Fib(1) = 1 and interval reduction ratios
+# Fib(n - 1) / Fib(n), shared by every call of fibonacci_method and
+# extended on demand by fibonacci_table
+_fibonacci = [1, 1]
+_fibonacci_ratios = [1.0, 1.0]
+
+
+def fibonacci_table(n):
+    while len(_fibonacci) <= n:
+        _fibonacci.append(_fibonacci[-1] + _fibonacci[-2])
+        _fibonacci_ratios.append(_fibonacci[-2] / _fibonacci[-1])
+    return _fibonacci, _fibonacci_ratios
+
+
+# The least n >= 1 such that 2 * len_ab < eps * Fib(n), but at most max_steps.
+# Fib(n) ~ PHI^(n + 1) / sqrt(5), so we take n from the logarithm and
+# correct it by a step or two
+def find_n(len_ab, eps, max_steps):
+    target = 2 * len_ab / eps
+    if target < 1:
+        return 1
+    n = math.ceil(math.log(target * 5 ** 0.5, PHI)) - 1
+    n = min(max(n, 1), max_steps)
+    fibonacci, _ = fibonacci_table(n + 1)
+    while n < max_steps and fibonacci[n] <= target:
+        n += 1
+        fibonacci, _ = fibonacci_table(n)
+    while n > 1 and fibonacci[n - 1] > target:
+        n -= 1
+    return n
 
 
 # |b_k - a_k| ~ |b_0 - a_0| * Fib(n - k - 1) / Fib(n - k)
 # Each iteration calls f once
 # Iterations will be = n, where n: |b_0 - a_0| / Fib(n) < eps / 2
 # Returns x*, number of iterations, number of calls f
-def fibonacci_method(eps, a, b, f, max_steps, fibonacci):
-    if max_steps > FIBONACCI_MAX_STEPS:
-        max_steps = FIBONACCI_MAX_STEPS
-    n = find_n(abs(b - a), eps, fibonacci, max_steps)
+def fibonacci_method(eps, a, b, f, max_steps, max_function_calls=None, cache=None):
+    f = Evaluations(f, max_function_calls, cache)
+    n = find_n(abs(b - a), eps, max_steps)
+    _, ratios = fibonacci_table(n)
+
+    if not f.has_budget(2):  # the first call and one for the end
+        return (a + b) / 2, 0, f.calls
 
     iterations = 1
-    x1 = a + fibonacci[n - 2] / fibonacci[n] * abs(b - a)
-    x2 = a + fibonacci[n - 1] / fibonacci[n] * abs(b - a)
+    x1 = a + (1 - ratios[n]) * abs(b - a)
+    x2 = a + ratios[n] * abs(b - a)
     know_f1 = True
     f_old = f(x1)
-    while iterations < n - 2:
+    while iterations < n - 2 and f.has_budget(3):  # and two calls for the end
         if know_f1:
             f1 = f_old
             f2 = f(x2)
@@ -106,13 +372,13 @@ def fibonacci_method(eps, a, b, f, max_steps, fibonacci):
             x2 = x1
             know_f1 = False
             f_old = f1
-            x1 = a + fibonacci[n - iterations - 2] / fibonacci[n - iterations] * (b - a)
+            x1 = a + (1 - ratios[n - iterations]) * (b - a)
         else:
             a = x1
             x1 = x2
             know_f1 = True
             f_old = f2
-            x2 = a + fibonacci[n - iterations - 1] / fibonacci[n - iterations] * (b - a)
+            x2 = a + ratios[n - iterations] * (b - a)
         iterations += 1
 
     sigma = 1e-8
@@ -120,24 +386,139 @@ def fibonacci_method(eps, a, b, f, max_steps, fibonacci):
     if f(x1) < f(x2):
         b = x2
 
+    x = (a + b) / 2
+    return x, iterations, f.calls
+
+
+# Batched versions of the methods above, without a cache and a budget:
+# 'a' and 'b' are arrays of
+# segments of the same shape, 'f' is vectorized, i.e. it maps an array
+# of points to an array of values. Every problem keeps its own
+# iteration counter and leaves the computation once it has converged,
+# so 'f' is called only on the points of unfinished problems.
+# Each returns arrays of x*, numbers of iterations, numbers of calls f
+
+
+def dichotomy_batch(eps, a, b, f, max_steps):
+    sigma = 1e-8
+    a = np.array(a, dtype=np.float64)
+    b = np.array(b, dtype=np.float64)
+    iterations = np.zeros(a.shape, dtype=np.int64)
+    active = (np.abs(b - a) > 2 * eps) & (iterations < max_steps)
+    while np.any(active):
+        x = (a[active] + b[active]) / 2
+        x1 = x - sigma
+        x2 = x + sigma
+        values = f(np.concatenate((x1, x2)))
+        f1, f2 = values[: len(x)], values[len(x) :]
+        left = f1 < f2
+        b[active] = np.where(left, x2, b[active])
+        a[active] = np.where(left, a[active], x1)
+        iterations[active] += 1
+        active &= (np.abs(b - a) > 2 * eps) & (iterations < max_steps)
+
+    x = (a + b) / 2
+    return x, iterations, iterations * 2
+
+
+def golden_section_batch(eps, a, b, f, max_steps):
+    a = np.array(a, dtype=np.float64)
+    b = np.array(b, dtype=np.float64)
+    x1 = b - (b - a) / PHI
+    x2 = a + (b - a) / PHI
+    iterations = np.zeros(a.shape, dtype=np.int64)
+    f1 = f(x1)
+    f2 = np.empty_like(f1)
+    active = (np.abs(b - a) > 2 * eps) & (iterations < max_steps)
+    if np.any(active):
+        f2[active] = f(x2[active])
+    while np.any(active):
+        iterations[active] += 1
+        left = active & (f1 < f2)
+        right = active & (f1 > f2)
+        active &= left | right  # equal values stop a problem, as in golden_section
+
+        b[left] = x2[left]
+        x2[left] = x1[left]
+        f2[left] = f1[left]
+        x1[left] = b[left] - (b[left] - a[left]) / PHI
+
+        a[right] = x1[right]
+        x1[right] = x2[right]
+        f1[right] = f2[right]
+        x2[right] = a[right] + (b[right] - a[right]) / PHI
+
+        active &= (np.abs(b - a) > 2 * eps) & (iterations < max_steps)
+        if np.any(active):
+            values = f(np.where(left, x1, x2)[active])
+            f1[active & left] = values[left[active]]
+            f2[active & right] = values[right[active]]
+
     x = (a + b) / 2
     return x, iterations, iterations + 1
 
 
-def compute_fibonacci(n, fibonacci):
-    if fibonacci[n] != 0:
-        return fibonacci[n]
-    fibonacci[n] = compute_fibonacci(n - 1, fibonacci) + compute_fibonacci(
-        n - 2, fibonacci
-    )
-    return fibonacci[n]
+def find_n_batch(len_ab, eps, max_steps):
+    target = 2 * np.asarray(len_ab, dtype=np.float64) / eps
+    n = np.ceil(np.log(np.maximum(target, 1) * 5 ** 0.5) / math.log(PHI)) - 1
+    n = np.clip(n, 1, max_steps).astype(np.int64)
+    top = np.max(n, initial=1) + 1
+    fibonacci, _ = fibonacci_table(top)
+    fibonacci = np.asarray(fibonacci[: top + 1], dtype=np.float64)
+    n += (n < max_steps) & (fibonacci[n] <= target)
+    n -= (n > 1) & (fibonacci[n - 1] > target)
+    n = np.where(target < 1, 1, n)
+    return n
 
 
-def pre_calc_for_fibonacci_method(max_steps):
-    if max_steps > FIBONACCI_MAX_STEPS:
-        max_steps = FIBONACCI_MAX_STEPS
-    fibonacci = [0] * (max_steps + 1)
-    fibonacci[0] = 1
-    fibonacci[1] = 1
-    compute_fibonacci(max_steps, fibonacci)
-    return fibonacci
+def fibonacci_method_batch(eps, a, b, f, max_steps):
+    a = np.array(a, dtype=np.float64)
+    b = np.array(b, dtype=np.float64)
+    n = find_n_batch(np.abs(b - a), eps, max_steps)
+    _, ratios = fibonacci_table(np.max(n, initial=2))
+    ratios = np.asarray(ratios)
+
+    iterations = np.ones(a.shape, dtype=np.int64)
+    x1 = a + (1 - ratios[n]) * np.abs(b - a)
+    x2 = a + ratios[n] * np.abs(b - a)
+    f1 = f(x1)
+    f2 = np.empty_like(f1)
+    know_f1 = np.ones(a.shape, dtype=bool)
+    calls = np.ones(a.shape, dtype=np.int64)
+    active = iterations < n - 2
+    if np.any(active):
+        f2[active] = f(x2[active])
+        calls[active] += 1
+    while np.any(active):
+        left = active & (f1 < f2)
+        right = active & ~left
+        k = n - iterations
+
+        b[left] = x2[left]
+        x2[left] = x1[left]
+        f2[left] = f1[left]
+        x1[left] = a[left] + (1 - ratios[k[left]]) * (b[left] - a[left])
+        know_f1[left] = False
+
+        a[right] = x1[right]
+        x1[right] = x2[right]
+        f1[right] = f2[right]
+        x2[right] = a[right] + ratios[k[right]] * (b[right] - a[right])
+
+        iterations[active] += 1
+        active &= iterations < n - 2
+        if np.any(active):
+            values = f(np.where(left, x1, x2)[active])
+            f1[active & left] = values[left[active]]
+            f2[active & right] = values[right[active]]
+            know_f1[active & left] = True
+            calls[active] += 1
+
+    sigma = 1e-8
+    if not np.all(know_f1):
+        f1[~know_f1] = f(x1[~know_f1])
+    b = np.where(f1 < f(x1 + sigma), x1 + sigma, b)
+    calls += 2 - know_f1
+
+    x = (a + b) / 2
+    return x, iterations, calls
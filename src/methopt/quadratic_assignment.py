@@ -51,6 +51,13 @@ def grad_from_hessian(hessian, n):
     return result
 
 
+# fn_from_hessian sums over i <= j, so the actual Hessian of fn has a
+# doubled diagonal
+def hessian_of_fn(hessian):
+    hessian = np.array(hessian, dtype=np.float64)
+    return hessian + np.diag(np.diag(hessian))
+
+
 def generate_quadratic_assignment(n, k):
     hess = generate_hessian(n, k)
     return fn_from_hessian(hess, n), grad_from_hessian(hess, n)
@@ -0,0 +1,305 @@
+from time import perf_counter
+
+import numpy as np
+
+import methopt.step_adjustment_strategy as strat
+from methopt.finite_differences import FiniteDifferences
+from methopt.grad_descent import GradDescentException
+from methopt.utils import IterationState, LastPointOracle, Telemetry
+
+
+def bfgs(
+    f,
+    f_grad,
+    x0,
+    max_iterations_count=1000,
+    step_adjustment_strategy="backtracking",
+    initial_step=1,
+    eps=1e-7,
+    iteration_callback=None,
+    f_and_grad=None,
+    telemetry=False,
+):
+    """Find an approximation of a local minimum of the function by the
+    BFGS quasi-Newton method: steps are taken along -H grad, where H is
+    an approximation of the inverse Hessian built from the differences
+    of the points and the gradients on the way, so no Hessian is
+    needed. H is a dense (n, n) matrix updated in O(n^2) per iteration,
+    see lbfgs for large n.
+
+    Arguments:
+    'f' — a diffentiable function to find minumum of
+    'f_grad' — a gradient of 'f', or None to find it by central
+    differences, see ./finite_differences.py
+    'x0' — initial guess
+
+    Keyword arguments:
+
+    'max_iterations_count' — a maximum number of iterations to do
+    before stopping at the best guess.
+
+    'step_adjustment_strategy' — a name of a strategy or an object of
+    strategy that finds a step along the direction. Available names
+    are "backtracking" (default, with the Wolfe conditions, which keep
+    H positive definite) and "divide_step". Other strategies of
+    ./step_adjustment_strategy.py can be passed as objects, those of
+    them that need only values of 'f' along the direction work here.
+    The strategy is reset before every search, the first trial step is
+    'initial_step'. A strategy object made with 'f' and 'f_grad' calls
+    them through the solver's cache, so its calls are counted too.
+
+    'initial_step' — a first trial step of every search, 1 by default:
+    near a minimum the quasi-Newton step is the exact one.
+
+    'eps' — the search stops once a distance between consecutive
+    points is smaller than 'eps'.
+
+    'f_and_grad' — a function returning a pair (f(x), f_grad(x)), see
+    grad_descent.
+
+    'telemetry' — if set, a SolverResult (see ./utils.py) is returned
+    instead of the point, with the time spent finding the direction
+    ("direction"), the step ("strategy") and updating the point and H
+    ("update").
+
+    'iteration_callback' — a function from (x, iteration_no), called
+    with named arguments after every iteration and with x0. Default is
+    no-op.
+
+    """
+    recorder = Telemetry() if telemetry else None
+    x = x0
+    for state in iter_bfgs(
+        f,
+        f_grad,
+        x0,
+        max_iterations_count=max_iterations_count,
+        step_adjustment_strategy=step_adjustment_strategy,
+        initial_step=initial_step,
+        eps=eps,
+        iteration_callback=iteration_callback,
+        f_and_grad=f_and_grad,
+        telemetry=recorder,
+    ):
+        x = state.x
+    if recorder is not None:
+        return recorder.result(x)
+    return x
+
+
+def lbfgs(
+    f,
+    f_grad,
+    x0,
+    memory=10,
+    max_iterations_count=1000,
+    step_adjustment_strategy="backtracking",
+    initial_step=1,
+    eps=1e-7,
+    iteration_callback=None,
+    f_and_grad=None,
+    telemetry=False,
+):
+    """Find an approximation of a local minimum of the function by the
+    limited-memory BFGS method: the same as bfgs, but H isn't stored.
+    The last 'memory' pairs of differences of the points and the
+    gradients are kept in two ('memory', n) arrays instead, and H grad
+    is found from them by the two-loop recursion, in O('memory' * n)
+    time and memory per iteration.
+
+    The other arguments are the ones of bfgs.
+
+    """
+    recorder = Telemetry() if telemetry else None
+    x = x0
+    for state in iter_lbfgs(
+        f,
+        f_grad,
+        x0,
+        memory=memory,
+        max_iterations_count=max_iterations_count,
+        step_adjustment_strategy=step_adjustment_strategy,
+        initial_step=initial_step,
+        eps=eps,
+        iteration_callback=iteration_callback,
+        f_and_grad=f_and_grad,
+        telemetry=recorder,
+    ):
+        x = state.x
+    if recorder is not None:
+        return recorder.result(x)
+    return x
+
+
+def iter_bfgs(f, f_grad, x0, telemetry=None, **kwargs):
+    # The same as bfgs, but yields an IterationState (see ./utils.py)
+    # after every iteration and records the run in 'telemetry', a
+    # Telemetry, if it's given.
+    x0 = np.array(x0, dtype=np.float64)
+    return _iter_quasi_newton(
+        f, f_grad, x0, _InverseHessian(len(x0)), telemetry=telemetry, **kwargs
+    )
+
+
+def iter_lbfgs(f, f_grad, x0, memory=10, telemetry=None, **kwargs):
+    # The same as lbfgs, but yields an IterationState (see ./utils.py)
+    # after every iteration and records the run in 'telemetry', a
+    # Telemetry, if it's given.
+    x0 = np.array(x0, dtype=np.float64)
+    return _iter_quasi_newton(
+        f, f_grad, x0, _History(len(x0), memory), telemetry=telemetry, **kwargs
+    )
+
+
+def _iter_quasi_newton(
+    f,
+    f_grad,
+    x0,
+    inverse_hessian,
+    max_iterations_count=1000,
+    step_adjustment_strategy="backtracking",
+    initial_step=1,
+    eps=1e-7,
+    iteration_callback=None,
+    f_and_grad=None,
+    telemetry=None,
+):
+    if iteration_callback is None:
+        iteration_callback = lambda **kwargs: ()
+
+    given = f, f_grad  # strategies made with them are routed to the oracle
+    if f_grad is None and f_and_grad is None:
+        f_grad = FiniteDifferences(f).grad
+    # f and the gradient at the accepted step are the ones at the next x
+    oracle = LastPointOracle(f, f_grad, f_and_grad)
+    f, f_grad = oracle.f, oracle.grad
+    if telemetry is not None:
+        telemetry.oracle = oracle
+
+    if step_adjustment_strategy == "backtracking":
+        step_adjustment_strategy = strat.BacktrackingStrategy(f, f_grad, wolfe=True)
+    elif step_adjustment_strategy == "divide_step":
+        step_adjustment_strategy = strat.DivideStepStrategy(f, f_grad)
+    elif not isinstance(step_adjustment_strategy, strat.StepAdjustmentStrategy):
+        raise GradDescentException(
+            f"Unknown step adjustment strategy: {step_adjustment_strategy}"
+        )
+
+    x_prev = x0
+    grad_prev = f_grad(x0)
+    iteration_callback(x=x0, iteration_no=0)
+    for k in range(1, max_iterations_count):
+        if telemetry is not None:
+            started = perf_counter()
+        direction = inverse_hessian.direction(grad_prev)
+        if np.dot(direction, grad_prev) >= 0:
+            # H has lost positive definiteness, start it over
+            inverse_hessian.reset()
+            direction = -grad_prev
+        if telemetry is not None:
+            telemetry.add_time("direction", started)
+            started = perf_counter()
+        context = strat.DirectionContext(f, f_grad, x_prev, direction)
+        with strat.evaluated_by(step_adjustment_strategy, oracle, *given):
+            step_adjustment_strategy.reset()
+            step = step_adjustment_strategy(x_prev, initial_step, k, context=context)
+        if telemetry is not None:
+            telemetry.add_time("strategy", started)
+            telemetry.iterations = k
+            started = perf_counter()
+        xk = x_prev + step * direction
+        if telemetry is not None:
+            telemetry.add_time("update", started)
+        iteration_callback(x=xk, iteration_no=k)
+        yield IterationState(oracle, xk, k, step)
+        # xk - x_prev is step * direction
+        if step * np.linalg.norm(direction) < eps:
+            if telemetry is not None:
+                telemetry.termination = "converged"
+            return
+
+        if telemetry is not None:
+            started = perf_counter()
+        grad = f_grad(xk)
+        inverse_hessian.update(xk - x_prev, grad - grad_prev)
+        x_prev = xk
+        grad_prev = grad
+        if telemetry is not None:
+            telemetry.add_time("update", started)
+
+
+class _InverseHessian:
+    """A dense approximation H of the inverse Hessian of BFGS"""
+
+    def __init__(self, n):
+        self.n = n
+        self.reset()
+
+    def reset(self):
+        self.H = None  # the identity, scaled at the first update
+
+    def direction(self, grad):
+        if self.H is None:
+            return -grad
+        return -(self.H @ grad)
+
+    def update(self, s, y):
+        sy = np.dot(s, y)
+        if sy <= _CURVATURE_EPS * np.linalg.norm(s) * np.linalg.norm(y):
+            return  # H wouldn't stay positive definite
+        if self.H is None:
+            # Nocedal and Wright, (6.20)
+            self.H = np.eye(self.n) * (sy / np.dot(y, y))
+
+        # H = (I - rho s y^T) H (I - rho y s^T) + rho s s^T, rho = 1 / (s, y)
+        Hy = self.H @ y
+        rho = 1 / sy
+        self.H -= rho * (np.outer(s, Hy) + np.outer(Hy, s))
+        self.H += (rho * rho * np.dot(y, Hy) + rho) * np.outer(s, s)
+
+
+class _History:
+    """The last 'memory' pairs (s, y) of L-BFGS in ring buffers"""
+
+    def __init__(self, n, memory):
+        self.s = np.empty((memory, n))
+        self.y = np.empty((memory, n))
+        self.rho = np.empty(memory)
+        self.alpha = np.empty(memory)
+        self.reset()
+
+    def reset(self):
+        self.size = 0
+        self.newest = -1
+
+    def direction(self, grad):
+        # the two-loop recursion, Nocedal and Wright, algorithm 7.4
+        memory = len(self.rho)
+        order = [(self.newest - i) % memory for i in range(self.size)]
+        q = -np.array(grad, dtype=np.float64)
+        for i in order:
+            self.alpha[i] = self.rho[i] * np.dot(self.s[i], q)
+            q -= self.alpha[i] * self.y[i]
+        if self.size > 0:
+            newest = self.newest
+            q *= np.dot(self.s[newest], self.y[newest]) / np.dot(
+                self.y[newest], self.y[newest]
+            )
+        for i in reversed(order):
+            beta = self.rho[i] * np.dot(self.y[i], q)
+            q += (self.alpha[i] - beta) * self.s[i]
+        return q
+
+    def update(self, s, y):
+        sy = np.dot(s, y)
+        if sy <= _CURVATURE_EPS * np.linalg.norm(s) * np.linalg.norm(y):
+            return  # the pair would make H not positive definite
+        self.newest = (self.newest + 1) % len(self.rho)
+        self.s[self.newest] = s
+        self.y[self.newest] = y
+        self.rho[self.newest] = 1 / sy
+        self.size = min(self.size + 1, len(self.rho))
+
+
+# pairs with (s, y) <= _CURVATURE_EPS |s| |y| are skipped
+_CURVATURE_EPS = 1e-10
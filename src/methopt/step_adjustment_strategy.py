@@ -1,3 +1,8 @@
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
 import methopt.one_dimensional_methods as impl
 
 
@@ -24,9 +29,109 @@ class StepAdjustmentStrategy:
         self.f_grad = f_grad
         self.eps = eps
 
-    def __call__(self, x, step_prev, iteration_no=None):
+    def __call__(self, x, step_prev, iteration_no=None, context=None):
+        """Find a gradient step at 'x'.
+
+        'context' — an EvaluationContext of 'x' to take f(x) and the
+        gradient from, grad_descent passes it so that they are computed
+        once per iteration. A new one is made if it's None.
+
+        """
         raise NotImplemented
 
+    def _context(self, x, context=None):
+        if context is None:
+            context = EvaluationContext(self.f, self.f_grad, x)
+        return context
+
+    def reset(self):
+        """Forget everything remembered during the previous search, is
+        called by grad_descent before it starts
+
+        """
+        pass
+
+
+@contextmanager
+def evaluated_by(strategy, oracle, f, f_grad):
+    """Within the block, 'strategy' calls 'oracle', a LastPointOracle
+    (see ./utils.py) of 'f' and 'f_grad', instead of 'f' and 'f_grad',
+    if it was made with them. So its calls are cached and counted along
+    with the calls of the solver that owns 'oracle'.
+
+    """
+    saved = strategy.f, strategy.f_grad
+    if strategy.f is f:
+        strategy.f = oracle.f
+    if strategy.f_grad is f_grad:
+        strategy.f_grad = oracle.grad
+    try:
+        yield strategy
+    finally:
+        strategy.f, strategy.f_grad = saved
+
+
+class EvaluationContext:
+    """Values of a function and its gradient at a point, computed on
+    first access and shared by everyone who needs them at this point
+
+    """
+
+    def __init__(self, f, f_grad, x):
+        self.f = f
+        self.f_grad = f_grad
+        self.x = x
+        self._fx = None
+        self._grad = None
+
+    @property
+    def fx(self):
+        if self._fx is None:
+            self._fx = self.f(self.x)
+        return self._fx
+
+    @property
+    def grad(self):
+        if self._grad is None:
+            self._grad = self.f_grad(self.x)
+        return self._grad
+
+    @property
+    def slope(self):
+        """A derivative of f(x - step * grad) at step = 0"""
+        grad = self.grad
+        return -np.dot(grad, grad)
+
+
+class DirectionContext(EvaluationContext):
+    """An EvaluationContext for a search along 'direction' rather than
+    along the antigradient. Strategies take steps x - step * grad, so
+    here 'grad' is -direction, and the gradient of f is 'f_grad' (x).
+
+    """
+
+    def __init__(self, f, f_grad, x, direction):
+        super().__init__(f, f_grad, x)
+        self._grad = -direction
+        self.direction = direction
+
+    @property
+    def slope(self):
+        return np.dot(self.f_grad(self.x), self.direction)
+
+
+class LineSearchState:
+    """What a one-dimensional strategy remembers between its calls: the
+    last accepted step, the segment it was found on and the gradient
+    norm at the first call
+
+    """
+
+    def __init__(self):
+        self.step = None
+        self.bracket = None
+        self.first_grad_norm = None
+
 
 class DivideStepStrategy(StepAdjustmentStrategy):
     """A strategy to find a new gradient step by by taking the old step
@@ -38,28 +143,394 @@ class DivideStepStrategy(StepAdjustmentStrategy):
 
     """
 
-    def __call__(self, x, step_prev, iteration_no):
+    def __call__(self, x, step_prev, iteration_no, context=None):
+        context = self._context(x, context)
         if iteration_no % 100 == 0:  # try bigger step
             step = step_prev * 256
         else:
             step = step_prev
 
-        x_new = x - step * self.f_grad(x)
-        fx = self.f(x)
+        grad = context.grad
+        x_new = x - step * grad
+        fx = context.fx
         while self.f(x_new) >= fx and step > self.eps:
             step /= 2
-            x_new = x - step * self.f_grad(x)
+            x_new = x - step * grad
+
+        return step
+
+
+class BacktrackingStrategy(StepAdjustmentStrategy):
+    """An inexact line search that accepts a step as soon as it gives a
+    sufficient decrease (the Armijo condition)
+
+        f(x - step * grad) <= f(x) - c1 * step * |grad|^2
+
+    and, if 'wolfe' is set, the slope along the gradient has flattened
+    enough (the curvature condition)
+
+        (f_grad(x - step * grad), grad) <= c2 * |grad|^2
+
+    A rejected step is replaced by the minimum of a quadratic or a cubic
+    interpolating f along the gradient through the values known so far,
+    the directional derivative -|grad|^2 included. The first trial step
+    is chosen to give the same first-order decrease as the previous
+    accepted step did, so it is usually accepted at once.
+
+    After every call 'function_calls' holds the number of calls of 'f'
+    made to find the step.
+
+    """
+
+    def __init__(
+        self, f, f_grad, c1=None, c2=None, wolfe=False, max_steps=None, eps=None
+    ):
+        super().__init__(f, f_grad, eps)
+
+        if c1 is None:
+            c1 = 1e-4
+        if c2 is None:
+            c2 = 0.9
+        if max_steps is None:
+            max_steps = 30
+
+        self.c1 = c1
+        self.c2 = c2
+        self.wolfe = wolfe
+        self.max_steps = max_steps
+        self.function_calls = 0
+        self._decrease_prev = None
+
+    def reset(self):
+        self._decrease_prev = None
+
+    def __call__(self, x, step_prev, iteration_no=None, context=None):
+        context = self._context(x, context)
+        grad = context.grad
+        fx = context.fx
+        dphi = context.slope  # a derivative of f(x - step * grad) at 0
+        self.function_calls = 0
+        if dphi >= 0:
+            return 0
+
+        step = step_prev
+        if self._decrease_prev is not None:
+            step = self._decrease_prev / -dphi
+
+        lo, phi_lo, dphi_lo = 0, fx, dphi
+        hi = phi_hi = None
+        for _ in range(self.max_steps):
+            phi_step = self.f(x - step * grad)
+            self.function_calls += 1
+            if phi_step > fx + self.c1 * step * dphi or phi_step >= phi_lo:
+                step_new = _interpolate(lo, phi_lo, dphi_lo, step, phi_step, hi, phi_hi)
+                hi, phi_hi = step, phi_step
+                step = np.clip(step_new, lo + 0.1 * (hi - lo), lo + 0.5 * (hi - lo))
+            elif self.wolfe:
+                dphi_step = -np.dot(self.f_grad(x - step * grad), grad)
+                if dphi_step >= self.c2 * dphi:
+                    break
+                lo, phi_lo, dphi_lo = step, phi_step, dphi_step
+                if hi is None:
+                    step *= 2
+                else:
+                    step_new = _interpolate(lo, phi_lo, dphi_lo, hi, phi_hi)
+                    step = np.clip(step_new, lo + 0.1 * (hi - lo), hi - 0.1 * (hi - lo))
+            else:
+                break
+
+            if hi is not None and hi - lo < self.eps:
+                step = lo if lo > 0 else step
+                break
+
+        self._decrease_prev = step * -dphi
+        return step
+
+
+class BarzilaiBorweinStrategy(StepAdjustmentStrategy):
+    """A strategy that takes a step from the last two points and
+    gradients, s = x - x_prev and y = grad - grad_prev:
+
+        step = (s, s) / (s, y) for the "long" variant,
+        step = (s, y) / (y, y) for the "short" one.
+
+    It needs no calls of 'f' at all. The first step is 'step_prev'.
+
+    If 'nonmonotone_memory' is set to M, the step is safeguarded by the
+    non-monotone line search of NonmonotoneStrategy with memory M. This
+    costs a call of 'f' per trial, but keeps the method from diverging
+    on non-quadratic functions.
+
+    After every call 'function_calls' holds the number of calls of 'f'
+    made to find the step.
+
+    """
+
+    def __init__(
+        self,
+        f,
+        f_grad,
+        variant="long",
+        nonmonotone_memory=None,
+        c1=None,
+        min_step=None,
+        max_step=None,
+        eps=None,
+    ):
+        super().__init__(f, f_grad, eps)
+
+        if variant not in ("long", "short"):
+            raise ValueError(f"Unknown Barzilai-Borwein variant: {variant}")
+        if c1 is None:
+            c1 = 1e-4
+        if min_step is None:
+            min_step = 1e-10
+        if max_step is None:
+            max_step = 1e10
+
+        self.variant = variant
+        self.nonmonotone_memory = nonmonotone_memory
+        self.c1 = c1
+        self.min_step = min_step
+        self.max_step = max_step
+        self.function_calls = 0
+        self.reset()
+
+    def reset(self):
+        self._x_prev = None
+        self._grad_prev = None
+        self._search = None
+        if self.nonmonotone_memory is not None:
+            self._search = _NonmonotoneSearch(
+                self.f, self.nonmonotone_memory, self.c1, self.eps
+            )
+
+    def __call__(self, x, step_prev, iteration_no=None, context=None):
+        context = self._context(x, context)
+        grad = context.grad
+        self.function_calls = 0
+
+        step = step_prev
+        if self._x_prev is not None:
+            step = _barzilai_borwein_step(
+                x - self._x_prev, grad - self._grad_prev, self.variant, step_prev
+            )
+            step = min(max(step, self.min_step), self.max_step)
+        self._x_prev = x
+        self._grad_prev = grad
+
+        if self._search is not None:
+            step, self.function_calls = self._search(x, step, context)
+        return step
+
+
+class NonmonotoneStrategy(StepAdjustmentStrategy):
+    """A non-monotone line search of Grippo, Lampariello and Lucidi: a
+    step is accepted if
+
+        f(x - step * grad) <= max of the last M values of f
+                              - c1 * step * |grad|^2,
+
+    so f may grow for a while, which lets the descent follow long
+    curved valleys without shrinking the step to nothing. A trial step
+    is halved until it is accepted.
+
+    If 'spectral' is set (default), the trial step is the (long)
+    Barzilai-Borwein step, as in the method of Raydan. Otherwise it is
+    'growth' * 'step_prev'.
+
+    The last M values live in a ring buffer. The value at the accepted
+    trial point is the value at the next point of grad_descent, so 'f'
+    is called only at trial points.
+
+    After every call 'function_calls' holds the number of calls of 'f'
+    made to find the step.
+
+    """
+
+    def __init__(
+        self, f, f_grad, memory=None, c1=None, spectral=True, growth=None, eps=None
+    ):
+        super().__init__(f, f_grad, eps)
+
+        if memory is None:
+            memory = 10
+        if c1 is None:
+            c1 = 1e-4
+        if growth is None:
+            growth = 2
+
+        self.memory = memory
+        self.c1 = c1
+        self.spectral = spectral
+        self.growth = growth
+        self.function_calls = 0
+        self.reset()
+
+    def reset(self):
+        self._x_prev = None
+        self._grad_prev = None
+        self._search = _NonmonotoneSearch(self.f, self.memory, self.c1, self.eps)
+
+    def __call__(self, x, step_prev, iteration_no=None, context=None):
+        context = self._context(x, context)
+        grad = context.grad
+
+        if self.spectral and self._x_prev is not None:
+            step = _barzilai_borwein_step(
+                x - self._x_prev, grad - self._grad_prev, "long", step_prev
+            )
+        elif self.spectral:
+            step = step_prev
+        else:
+            step = self.growth * step_prev
+        self._x_prev = x
+        self._grad_prev = grad
 
+        step, self.function_calls = self._search(x, step, context)
         return step
 
 
+class _NonmonotoneSearch:
+    """The acceptance test of NonmonotoneStrategy with its ring buffer
+    of the last 'memory' values of f
+
+    """
+
+    def __init__(self, f, memory, c1, eps):
+        self.f = f
+        self.c1 = c1
+        self.eps = eps
+        self._f_values = deque(maxlen=memory)
+        self._x_next = None
+        self._f_next = None
+
+    def __call__(self, x, step, context):
+        """Returns an accepted step and the number of calls of f"""
+        function_calls = 0
+        if self._x_next is not None and np.array_equal(x, self._x_next):
+            fx = self._f_next
+        else:
+            fx = context.fx
+            function_calls += 1
+        self._f_values.append(fx)
+        f_max = max(self._f_values)
+        grad = context.grad
+        dphi = context.slope
+
+        while True:
+            x_new = x - step * grad
+            f_new = self.f(x_new)
+            function_calls += 1
+            if f_new <= f_max + self.c1 * step * dphi or step <= self.eps:
+                break
+            step /= 2
+
+        self._x_next = x_new
+        self._f_next = f_new
+        return step, function_calls
+
+
+def _barzilai_borwein_step(s, y, variant, default):
+    sy = np.dot(s, y)
+    if sy <= 0:
+        return default
+    if variant == "long":
+        return np.dot(s, s) / sy
+    return sy / np.dot(y, y)
+
+
+class QuadraticStrategy(StepAdjustmentStrategy):
+    """An exact line search for a quadratic function
+
+        f(x) = 0.5 (Qx, x) + (b, x) + c,
+
+    whose minimum along the gradient g is at step = (g, g) / (Qg, g).
+    Costs one product by 'Q' per call and no calls of 'f'.
+
+    'Q' — a symmetric positive definite matrix or a function that
+    computes Q @ v
+
+    """
+
+    def __init__(self, f, f_grad, Q, eps=None):
+        super().__init__(f, f_grad, eps)
+
+        if callable(Q):
+            self.Q_dot = Q
+        else:
+            self.Q_dot = lambda v: np.dot(Q, v)
+
+    def __call__(self, x, step_prev=None, iteration_no=None, context=None):
+        grad = self._context(x, context).grad
+        curvature = np.dot(self.Q_dot(grad), grad)
+        if curvature <= 0:
+            return 0
+        return np.dot(grad, grad) / curvature
+
+
+def _interpolate(lo, phi_lo, dphi_lo, step, phi_step, step_old=None, phi_old=None):
+    """The minimum of a quadratic through phi(lo), phi'(lo), phi(step) or,
+    if 'step_old' is given, of a cubic through phi(step_old) as well
+
+    """
+    t = step - lo
+    d = phi_step - phi_lo - dphi_lo * t
+    if step_old is not None:
+        t_old = step_old - lo
+        d_old = phi_old - phi_lo - dphi_lo * t_old
+        denominator = t ** 2 * t_old ** 2 * (t - t_old)
+        a = (t_old ** 2 * d - t ** 2 * d_old) / denominator
+        b = (-(t_old ** 3) * d + t ** 3 * d_old) / denominator
+        discriminant = b ** 2 - 3 * a * dphi_lo
+        if a != 0 and discriminant >= 0:
+            return lo + (-b + discriminant ** 0.5) / (3 * a)
+        if a == 0 and b != 0:
+            return lo - dphi_lo / (2 * b)
+    if d <= 0:
+        return step  # not convex, the caller's safeguard takes over
+    return lo - dphi_lo * t ** 2 / (2 * d)
+
+
 class OneDimOptimizationStrategy(StepAdjustmentStrategy):
     """A common class for all adjustment strategies that search for an
     optimal step via one-dimensional optimization methods
 
+    If 'bracketing' is set, the search segment is not [0, max_step]
+    but a segment found by expanding or contracting the previous step,
+    see one_dimensional_methods.bracket. The search on it makes fewer
+    iterations, as many as it takes to narrow it as much as 'max_steps'
+    iterations narrow [0, max_step], so the bracket pays for itself.
+
+    If 'warm_start' is set, the search starts on [0, 4 * last step],
+    widening it while the minimum is at its right end, and the step is
+    found up to 'relative_eps' * last step * (gradient norm / first
+    gradient norm), but not more precisely than 'eps'. So the search
+    is coarse far from the minimum and gets precise near it.
+
+    If 'max_function_calls' is set, the search makes at most that many
+    calls of 'f' per step, bracketing included. After every call
+    'function_calls' holds the number of calls of 'f' made to find the
+    step.
+
     """
 
-    def __init__(self, f, f_grad, opt_method, max_step, max_steps=None, eps=None):
+    relative_eps = 1e-2
+    # how many times an iteration of 'opt_method' narrows the segment
+    reduction = impl.PHI
+
+    def __init__(
+        self,
+        f,
+        f_grad,
+        opt_method,
+        max_step,
+        max_steps=None,
+        eps=None,
+        bracketing=False,
+        max_function_calls=None,
+        warm_start=False,
+    ):
         super().__init__(f, f_grad, eps)
 
         if max_steps is None:
@@ -68,15 +539,112 @@ class OneDimOptimizationStrategy(StepAdjustmentStrategy):
         self.max_step = max_step
         self.max_steps = max_steps
         self.opt_method = opt_method
+        self.bracketing = bracketing
+        self.max_function_calls = max_function_calls
+        self.warm_start = warm_start
+        self.function_calls = 0
+        self.state = LineSearchState()
+
+    def reset(self):
+        self.state = LineSearchState()
+
+    def _has_budget(self):
+        return (
+            self.max_function_calls is None
+            or self.function_calls < self.max_function_calls
+        )
+
+    def _remaining_budget(self):
+        if self.max_function_calls is None:
+            return None
+        return self.max_function_calls - self.function_calls
 
-    def __call__(self, x, step_prev=None, iteration_no=None):
-        g = lambda step: self.f(x - step * self.f_grad(x))
-        step, *_ = self.opt_method(self.eps, 0, self.max_step, g, self.max_steps)
+    def _search(self, eps, a, b, g, cache, max_steps=None):
+        if max_steps is None:
+            max_steps = self.max_steps
+        if not self._has_budget():
+            # no calls left, the best step evaluated on [a, b] is taken
+            known = [(value, x) for x, value in cache.items() if a <= x <= b]
+            return min(known)[1] if known else (a + b) / 2
+        step, _, calls = self.opt_method(
+            eps,
+            a,
+            b,
+            g,
+            max_steps,
+            max_function_calls=self._remaining_budget(),
+            cache=cache,
+        )
+        self.function_calls += calls
+        return step
+
+    def __call__(self, x, step_prev=None, iteration_no=None, context=None):
+        grad = self._context(x, context).grad
+        g = lambda step: self.f(x - step * grad)
+        cache = impl.EvaluationCache()
+        self.function_calls = 0
+        eps = self.eps
+
+        if self.warm_start:
+            grad_norm = np.linalg.norm(grad)
+            if self.state.first_grad_norm is None:
+                self.state.first_grad_norm = grad_norm
+            if self.state.first_grad_norm > 0 and self.state.step:
+                eps = max(
+                    self.eps,
+                    self.relative_eps
+                    * self.state.step
+                    * grad_norm
+                    / self.state.first_grad_norm,
+                )
+
+        if self.warm_start and self.state.step:
+            _, b_prev = self.state.bracket
+            a, b = 0, min(self.max_step, max(4 * self.state.step, b_prev / 2))
+            step = self._search(eps, a, b, g, cache)
+            while b - step <= 2 * eps and b < self.max_step and self._has_budget():
+                a, b = max(a, b - 2 * eps), min(self.max_step, 4 * b)
+                step = self._search(eps, a, b, g, cache)
+        elif self.bracketing:
+            if not step_prev:
+                step_prev = self.max_step
+            a, b, self.function_calls = impl.bracket(
+                g,
+                step_prev,
+                self.max_step,
+                self.eps,
+                self.max_steps,
+                max_function_calls=self.max_function_calls,
+                cache=cache,
+            )
+            # the iterations it would take to narrow [0, max_step] to [a, b]
+            saved = int(np.log(self.max_step / (b - a)) / np.log(self.reduction))
+            max_steps = max(self.max_steps - saved, 1)
+            step = self._search(eps, a, b, g, cache, max_steps)
+        else:
+            a, b = 0, self.max_step
+            step = self._search(eps, a, b, g, cache)
+
+        if self.warm_start:
+            self.state.step = step
+            self.state.bracket = (a, b)
         return step
 
 
 class DichotomyStrategy(OneDimOptimizationStrategy):
-    def __init__(self, f, f_grad, max_step, max_steps=None, eps=None):
+    reduction = 2
+
+    def __init__(
+        self,
+        f,
+        f_grad,
+        max_step,
+        max_steps=None,
+        eps=None,
+        bracketing=False,
+        max_function_calls=None,
+        warm_start=False,
+    ):
         super().__init__(
             f,
             f_grad,
@@ -84,11 +652,24 @@ class DichotomyStrategy(OneDimOptimizationStrategy):
             max_step=max_step,
             max_steps=max_steps,
             eps=eps,
+            bracketing=bracketing,
+            max_function_calls=max_function_calls,
+            warm_start=warm_start,
         )
 
 
 class GoldenSectionStrategy(OneDimOptimizationStrategy):
-    def __init__(self, f, f_grad, max_step, max_steps=None, eps=None):
+    def __init__(
+        self,
+        f,
+        f_grad,
+        max_step,
+        max_steps=None,
+        eps=None,
+        bracketing=False,
+        max_function_calls=None,
+        warm_start=False,
+    ):
         super().__init__(
             f,
             f_grad,
@@ -96,23 +677,57 @@ class GoldenSectionStrategy(OneDimOptimizationStrategy):
             max_step=max_step,
             max_steps=max_steps,
             eps=eps,
+            bracketing=bracketing,
+            max_function_calls=max_function_calls,
+            warm_start=warm_start,
         )
 
 
-class FibonacciStrategy(OneDimOptimizationStrategy):
-    def __init__(self, f, f_grad, max_step, max_steps=None, eps=None):
+class BrentStrategy(OneDimOptimizationStrategy):
+    def __init__(
+        self,
+        f,
+        f_grad,
+        max_step,
+        max_steps=None,
+        eps=None,
+        bracketing=False,
+        max_function_calls=None,
+        warm_start=False,
+    ):
         super().__init__(
             f,
             f_grad,
-            opt_method=None,  # we are going to set it later
+            opt_method=impl.brent,
             max_step=max_step,
             max_steps=max_steps,
             eps=eps,
+            bracketing=bracketing,
+            max_function_calls=max_function_calls,
+            warm_start=warm_start,
         )
-        fibo = [0 for _ in range(self.max_steps + 1)]  # memoize fibonacci numbers
-        fibo[0] = 1
-        fibo[1] = 1
-        impl.compute_fibonacci(self.max_steps, fibo)
-        self.opt_method = lambda *args, **kwargs: impl.fibonacci_method(
-            *args, **kwargs, fibonacci=fibo
+
+
+class FibonacciStrategy(OneDimOptimizationStrategy):
+    def __init__(
+        self,
+        f,
+        f_grad,
+        max_step,
+        max_steps=None,
+        eps=None,
+        bracketing=False,
+        max_function_calls=None,
+        warm_start=False,
+    ):
+        super().__init__(
+            f,
+            f_grad,
+            opt_method=impl.fibonacci_method,
+            max_step=max_step,
+            max_steps=max_steps,
+            eps=eps,
+            bracketing=bracketing,
+            max_function_calls=max_function_calls,
+            warm_start=warm_start,
         )
@@ -0,0 +1,131 @@
+import numpy as np
+
+from methopt.grad_descent import GradDescentException
+
+
+def stochastic_grad_descent(
+    sample_grad,
+    data,
+    x0,
+    epochs=10,
+    batch_size=32,
+    chunk_size=None,
+    method="plain",
+    initial_step=1e-2,
+    decay=None,
+    momentum=None,
+    beta1=None,
+    beta2=None,
+    eps=None,
+    seed=None,
+    iteration_callback=None,
+):
+    """Find an approximation of a minimum of a finite sum
+    f(x) = 1/m sum_i f_i(x), where f_i depend on rows of 'data', by
+    taking steps along gradients of the sum over small random batches.
+
+    Arguments:
+    'sample_grad' — a function from (x, batch), where batch is a (b, d)
+    array of rows of 'data', returning the mean gradient of f_i over
+    the batch
+    'data' — a (m, d) array of samples. It can be an np.memmap: only
+    'chunk_size' rows of it are in memory at a time
+    'x0' — initial guess
+
+    Keyword arguments:
+
+    'epochs' — a number of passes over 'data'
+
+    'batch_size' — a number of rows in a batch
+
+    'chunk_size' — a number of consecutive rows read from 'data' at
+    once. The order of chunks and of rows inside a chunk is shuffled
+    every epoch, bigger chunks give better shuffling and faster reads
+    for the same memory. Default is 64 batches.
+
+    'method' — "plain" — x -= step * grad; "momentum" — heavy ball,
+    v = 'momentum' * v + grad, x -= step * v, 'momentum' is 0.9 by
+    default; "adam" — Adam of Kingma and Ba with moment decay rates
+    'beta1' and 'beta2', 0.9 and 0.999 by default.
+
+    'initial_step' — a step at the first iteration. The step at
+    iteration k is initial_step / (1 + 'decay' * k), 'decay' is 0
+    (a constant step) by default.
+
+    'eps' — the search stops once x moves less than 'eps' during an
+    epoch. Default is 1e-8.
+
+    'seed' — a seed of the shuffling.
+
+    'iteration_callback' — a function from (x, iteration_no, epoch),
+    called with named arguments before every step. x is updated in
+    place, so copy it to keep it. Default is no-op.
+
+    """
+    if chunk_size is None:
+        chunk_size = 64 * batch_size
+    if decay is None:
+        decay = 0
+    if momentum is None:
+        momentum = 0.9
+    if beta1 is None:
+        beta1 = 0.9
+    if beta2 is None:
+        beta2 = 0.999
+    if eps is None:
+        eps = 1e-8
+    if iteration_callback is None:
+        iteration_callback = lambda **kwargs: ()  # no-op
+    if method not in ("plain", "momentum", "adam"):
+        raise GradDescentException(f"Unknown method: {method}")
+    if chunk_size < batch_size:
+        raise GradDescentException("chunk_size must not be less than batch_size")
+
+    rng = np.random.default_rng(seed)
+    x = np.array(x0, dtype=np.float64)
+    v = np.zeros_like(x)  # velocity or the first moment
+    s = np.zeros_like(x)  # the second moment
+    x_epoch = np.empty_like(x)
+    iteration_no = 0
+    for epoch in range(epochs):
+        x_epoch[...] = x
+        for chunk in _shuffled_chunks(data, chunk_size, rng):
+            for start in range(0, len(chunk), batch_size):
+                iteration_callback(x=x, iteration_no=iteration_no, epoch=epoch)
+                grad = sample_grad(x, chunk[start : start + batch_size])
+                step = initial_step / (1 + decay * iteration_no)
+                iteration_no += 1
+
+                if method == "plain":
+                    x -= step * grad
+                elif method == "momentum":
+                    v *= momentum
+                    v += grad
+                    x -= step * v
+                else:
+                    v *= beta1
+                    v += (1 - beta1) * grad
+                    s *= beta2
+                    s += (1 - beta2) * grad * grad
+                    # bias corrections of the moments
+                    v_hat = v / (1 - beta1 ** iteration_no)
+                    s_hat = s / (1 - beta2 ** iteration_no)
+                    x -= step * v_hat / (np.sqrt(s_hat) + 1e-8)
+
+        if np.linalg.norm(x - x_epoch) < eps:
+            break
+
+    return x
+
+
+def _shuffled_chunks(data, chunk_size, rng):
+    """Yields chunks of consecutive rows of 'data' in random order, with
+    rows of every chunk shuffled
+
+    """
+    starts = np.arange(0, len(data), chunk_size)
+    rng.shuffle(starts)
+    for start in starts:
+        # a slice of a memmap is read from the disk only here
+        chunk = np.asarray(data[start : start + chunk_size])
+        yield chunk[rng.permutation(len(chunk))]
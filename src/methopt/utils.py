@@ -1,3 +1,8 @@
+from time import perf_counter
+
+import numpy as np
+
+
 class TrajectoryIterationCallback:
     def __init__(self, f):
         self.f = f
@@ -5,3 +10,199 @@ class TrajectoryIterationCallback:
 
     def __call__(self, x, **kwargs):
         self.trajectory.append((x, self.f(x)))
+
+
+class LastPointOracle:
+    """A function and its gradient that remember their values at the
+    last point each of them was evaluated at, so that asking for the
+    same point again costs nothing.
+
+    Either 'f' and 'f_grad' or 'f_and_grad', a function returning a
+    pair (f(x), f_grad(x)), should be given. With 'f_and_grad' both
+    values are remembered after any of them is asked for.
+
+    'f_calls' and 'grad_calls' count the calls that were not answered
+    from memory.
+
+    """
+
+    def __init__(self, f=None, f_grad=None, f_and_grad=None):
+        if f_and_grad is None and (f is None or f_grad is None):
+            raise ValueError("Either f and f_grad or f_and_grad are required")
+
+        self._f = f
+        self._f_grad = f_grad
+        self._f_and_grad = f_and_grad
+        self._x_f = None
+        self._fx = None
+        self._x_grad = None
+        self._grad = None
+        self.f_calls = 0
+        self.grad_calls = 0
+
+    def f(self, x):
+        if not _same_point(x, self._x_f):
+            if self._f is None:
+                self._evaluate_both(x)
+            else:
+                self._x_f = _remember(x, self._x_f)
+                self._fx = self._f(x)
+                self.f_calls += 1
+        return self._fx
+
+    def grad(self, x, out=None):
+        """The gradient at 'x'. If 'out' is given, the gradient is
+        written into it, and 'f_grad' is called with it as 'out'
+
+        """
+        if not _same_point(x, self._x_grad):
+            if self._f_grad is None:
+                self._evaluate_both(x)
+            else:
+                self._x_grad = _remember(x, self._x_grad)
+                if out is None:
+                    self._grad = self._f_grad(x)
+                else:
+                    self._f_grad(x, out=out)
+                    self._grad = out
+                self.grad_calls += 1
+        if out is not None and out is not self._grad:
+            np.copyto(out, self._grad)
+            return out
+        return self._grad
+
+    def f_and_grad(self, x):
+        return self.f(x), self.grad(x)
+
+    def _evaluate_both(self, x):
+        self._fx, self._grad = self._f_and_grad(x)
+        self._x_f = _remember(x, self._x_f)
+        self._x_grad = _remember(x, self._x_grad)
+        self.f_calls += 1
+        self.grad_calls += 1
+
+
+class IterationState:
+    """A state of a solver after an iteration: the point 'x' it came to,
+    the 'iteration_no' and the 'step' it took. 'fx' and 'grad_norm' at x
+    are computed on access, through the solver's LastPointOracle, so
+    they usually cost nothing: the solver needs them too. 'f_calls' and
+    'grad_calls' are the numbers of calls made so far.
+
+    A state is only valid until the solver makes its next iteration,
+    with 'in_place' x is a buffer the solver reuses.
+
+    """
+
+    def __init__(self, oracle, x, iteration_no, step):
+        self.x = x
+        self.iteration_no = iteration_no
+        self.step = step
+        self._oracle = oracle
+
+    @property
+    def fx(self):
+        return self._oracle.f(self.x)
+
+    @property
+    def grad_norm(self):
+        return np.linalg.norm(self._oracle.grad(self.x))
+
+    @property
+    def f_calls(self):
+        return self._oracle.f_calls
+
+    @property
+    def grad_calls(self):
+        return self._oracle.grad_calls
+
+
+class SolverResult:
+    """What a solver found and what it took: the point 'x', 'fx' at it,
+    the number of 'iterations', of calls of f, of its gradient and of
+    its Hessian, the 'termination' reason ("converged",
+    "max_iterations", or "cancelled" by multistart) and 'times',
+    seconds spent in each phase of the iterations and in "total"
+
+    Calls made by step adjustment strategies are counted, strategy
+    objects included (see evaluated_by in ./step_adjustment_strategy.py).
+    The call that finds 'fx' for the result isn't.
+
+    """
+
+    def __init__(
+        self,
+        x,
+        fx,
+        iterations,
+        f_calls,
+        grad_calls,
+        hessian_calls,
+        termination,
+        times,
+    ):
+        self.x = x
+        self.fx = fx
+        self.iterations = iterations
+        self.f_calls = f_calls
+        self.grad_calls = grad_calls
+        self.hessian_calls = hessian_calls
+        self.termination = termination
+        self.times = times
+
+    def __repr__(self):
+        return (
+            f"SolverResult(x={self.x}, fx={self.fx}, iterations={self.iterations}, "
+            f"termination={self.termination!r})"
+        )
+
+
+class Telemetry:
+    """Collects a SolverResult while an iter_* solver runs: the solver
+    is given it as 'telemetry' and records its phases with
+    'add_time' and its iterations. Solvers without one don't time
+    anything.
+
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.iterations = 0
+        self.termination = "max_iterations"
+        self.hessian_calls = 0
+        self.oracle = None
+        self._started = perf_counter()
+
+    def add_time(self, phase, started):
+        """Adds the time since 'started', a perf_counter() value, to
+        'phase'
+
+        """
+        self.times[phase] = self.times.get(phase, 0) + perf_counter() - started
+
+    def result(self, x):
+        times = dict(self.times, total=perf_counter() - self._started)
+        f_calls, grad_calls = self.oracle.f_calls, self.oracle.grad_calls
+        return SolverResult(
+            x,
+            self.oracle.f(x),
+            self.iterations,
+            f_calls,
+            grad_calls,
+            self.hessian_calls,
+            self.termination,
+            times,
+        )
+
+
+def _same_point(x, y):
+    return y is not None and np.array_equal(x, y)
+
+
+def _remember(x, buffer):
+    """A copy of 'x', in 'buffer' if it fits"""
+    x = np.asarray(x)
+    if buffer is None or buffer.shape != x.shape or buffer.dtype != x.dtype:
+        return np.copy(x)
+    np.copyto(buffer, x)
+    return buffer
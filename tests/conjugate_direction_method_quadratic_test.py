@@ -163,3 +163,16 @@ def test_that_number_of_iterations_is_not_greater_than_number_of_dimensions():
 
     assert len(iteration_callback.trajectory) <= 3
     assert approx_equal(res, [1, 1])
+
+
+def test_in_place():
+    rng = np.random.default_rng(0)
+    A = rng.normal(size=(30, 30))
+    Q = A @ A.T + np.eye(30)
+    b = rng.normal(size=30)
+    x0 = np.zeros(30)
+
+    res = conjugate_direction_method_for_quadratic(Q, b, x0, in_place=True)
+    assert approx_equal(res, conjugate_direction_method_for_quadratic(Q, b, x0))
+    assert approx_equal(Q @ res + b, 0, eps=1e-5)
+    assert np.all(x0 == 0)
@@ -1,6 +1,9 @@
 import numpy as np
 
-from methopt.conjugate_direction_method import conjugate_direction_method
+from methopt.conjugate_direction_method import (
+    conjugate_direction_method,
+    iter_conjugate_direction_method,
+)
 from methopt.utils import TrajectoryIterationCallback
 
 EPS = 1e-3
@@ -137,3 +140,41 @@ def test_quadratic_functions_with_large_constants():
     )
 
     assert approx_equal(res, [1, 1])
+
+
+def test_iter_conjugate_direction_method():
+    # f = 10x^2 - 1000x
+    f = lambda x: 10 * x[0] ** 2 - 1000 * x[0]
+    grad = lambda x: np.array([20 * x[0] - 1000], dtype=np.float64)
+    x0 = np.array([30], dtype=np.float64)
+
+    states = list(iter_conjugate_direction_method(f, grad, x0, eps=EPS))
+    assert approx_equal(states[-1].x, conjugate_direction_method(f, grad, x0, eps=EPS))
+    assert approx_equal(states[-1].x, [50])
+    assert states[-1].f_calls > 0
+
+
+def test_telemetry():
+    # f = 10x^2 - 1000x
+    f = lambda x: 10 * x[0] ** 2 - 1000 * x[0]
+    grad = lambda x: np.array([20 * x[0] - 1000], dtype=np.float64)
+    x0 = np.array([30], dtype=np.float64)
+
+    res = conjugate_direction_method(f, grad, x0, eps=EPS, telemetry=True)
+    assert approx_equal(res.x, [50])
+    assert res.termination == "converged"
+    assert res.iterations >= 1
+    assert set(res.times) == {"line_search", "update", "total"}
+
+    res = conjugate_direction_method(f, grad, np.array([50.0]), telemetry=True)
+    assert res.iterations == 0
+    assert res.termination == "converged"
+
+
+def test_finite_differences():
+    # f = 10x^2 - 1000x
+    f = lambda x: 10 * x[0] ** 2 - 1000 * x[0]
+    x0 = np.array([30], dtype=np.float64)
+
+    res = conjugate_direction_method(f, None, x0, eps=EPS)
+    assert approx_equal(res, [50])
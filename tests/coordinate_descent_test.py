@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from methopt.coordinate_descent import coordinate_descent
+from methopt.grad_descent import GradDescentException
+from methopt.quadratic_assignment import (
+    generate_hessian,
+    grad_from_hessian,
+    hessian_of_fn,
+)
+
+EPS = 1e-5
+
+
+def approx_equal(a, b, eps=EPS):
+    return np.all(abs(a - b) < eps)
+
+
+# Rosenbrock function
+partials = [
+    lambda x: 400 * x[0] ** 3 + 2 * x[0] - 400 * x[0] * x[1] - 2,
+    lambda x: -200 * x[0] ** 2 + 200 * x[1],
+]
+
+
+@pytest.mark.parametrize("selection", ["cyclic", "random"])
+@pytest.mark.parametrize("x0", [[-1, -1], [0, 0], [1.87, -2.3], [1.2, 1.67]])
+def test_rosenbrock(selection, x0):
+    res = coordinate_descent(partials, x0, selection=selection, seed=0)
+    assert approx_equal(res, [1, 1])
+
+
+@pytest.mark.parametrize("blocks", [1, 3, [[0, 5], [1, 2, 3], [4, 6, 7]]])
+@pytest.mark.parametrize("selection", ["cyclic", "random"])
+def test_quadratic(blocks, selection):
+    n = 8
+    hess = generate_hessian(n, 10)
+    x0 = np.linspace(-10, 10, n)
+
+    res = coordinate_descent(
+        grad_from_hessian(hess, n), x0, blocks=blocks, selection=selection, seed=0
+    )
+    assert approx_equal(res, np.zeros(n))
+
+
+@pytest.mark.parametrize("blocks", [1, 4])
+def test_cached_residuals(blocks):
+    n = 20
+    hess = generate_hessian(n, 10)
+    grad = grad_from_hessian(hess, n)
+    calls = 0
+
+    def block_grad(x, block):
+        nonlocal calls
+        calls += len(block)
+        return np.array([grad[i](x) for i in block])
+
+    res = coordinate_descent(
+        block_grad, np.ones(n), blocks=blocks, Q=hessian_of_fn(hess)
+    )
+    assert approx_equal(res, np.zeros(n))
+    # partial derivatives are found only at x0
+    assert calls == n
+
+
+def test_unknown_selection():
+    with pytest.raises(GradDescentException):
+        coordinate_descent(partials, [0, 0], selection="greedy")
+
+
+@pytest.mark.parametrize("selection", ["cyclic", "random"])
+def test_one_block_stops(selection):
+    # a block of all the coordinates is picked every step
+    diagonal = np.array([1.0, 2.0, 3.0])
+    calls = 0
+
+    def block_grad(x, block):
+        nonlocal calls
+        calls += 1
+        return diagonal[block] * x[block]
+
+    res = coordinate_descent(
+        block_grad, [1.0, 1.0, 1.0], blocks=3, selection=selection, seed=0
+    )
+    assert approx_equal(res, np.zeros(3))
+    assert calls < 100
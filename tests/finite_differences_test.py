@@ -0,0 +1,72 @@
+import numpy as np
+
+from methopt.finite_differences import FiniteDifferences
+
+# f = 4x^6 + 10y^2 - 4xy + 10y + x sin(z)
+f = lambda x: (
+    4 * x[0] ** 6 + 10 * x[1] ** 2 - 4 * x[0] * x[1] + 10 * x[1] + x[0] * np.sin(x[2])
+)
+f_grad = lambda x: np.array(
+    [
+        24 * x[0] ** 5 - 4 * x[1] + np.sin(x[2]),
+        20 * x[1] - 4 * x[0] + 10,
+        x[0] * np.cos(x[2]),
+    ]
+)
+f_H = lambda x: np.array(
+    [
+        [120 * x[0] ** 4, -4, np.cos(x[2])],
+        [-4, 20, 0],
+        [np.cos(x[2]), 0, -x[0] * np.sin(x[2])],
+    ]
+)
+x = np.array([0.7, -1.3, 2.1])
+
+
+def test_grad():
+    for method, eps in (("central", 1e-8), ("forward", 1e-6)):
+        grad = FiniteDifferences(f, method).grad(x)
+        assert np.allclose(grad, f_grad(x), rtol=0, atol=eps)
+
+    out = np.empty(3)
+    assert FiniteDifferences(f).grad(x, out=out) is out
+    assert np.allclose(out, f_grad(x))
+
+    g = lambda x: (x - 3) ** 2
+    assert abs(FiniteDifferences(g).grad(1.0) + 4) < 1e-8
+
+
+def test_vectorized_evaluation():
+    calls = []
+
+    def counting(f):
+        def wrapper(x):
+            calls.append(np.shape(x))
+            return f(x)
+
+        return wrapper
+
+    fd = FiniteDifferences(counting(f))
+    fd.grad(x)
+    calls.clear()
+    fd.grad(x)
+    # all 2n points at once
+    assert calls == [(3, 6)]
+    assert fd.vectorized
+
+    # a function of a whole vector is called on every point
+    Q = f_H(x)
+    fd = FiniteDifferences(counting(lambda x: np.dot(x, Q @ x) / 2))
+    fd.grad(x)
+    calls.clear()
+    grad = fd.grad(x)
+    assert calls == [(3,)] * 6
+    assert not fd.vectorized
+    assert np.allclose(grad, Q @ x)
+
+
+def test_hessian():
+    assert np.allclose(FiniteDifferences(f).hessian(x), f_H(x), rtol=0, atol=1e-5)
+    H = FiniteDifferences(f, f_grad=f_grad).hessian(x)
+    assert np.allclose(H, f_H(x), rtol=0, atol=1e-7)
+    assert np.all(H == H.T)
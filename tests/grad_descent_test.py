@@ -1,5 +1,12 @@
-from methopt.grad_descent import grad_descent
+import numpy as np
+
+from methopt.grad_descent import grad_descent, grad_descent_batch, iter_grad_descent
 import methopt.step_adjustment_strategy as step
+from methopt.quadratic_assignment import (
+    generate_hessian,
+    fn_from_hessian,
+    hessian_of_fn,
+)
 
 EPS = 1e-7
 
@@ -75,6 +82,634 @@ def test_grad_descent_fibonacci():
     )
 
 
+def test_grad_descent_brent():
+    f = lambda x: (x - 3) ** 2 + 8
+    f_grad = lambda x: 2 * (x - 3)
+    x0 = -6
+
+    strategy = step.BrentStrategy(f, f_grad, max_step=1000, max_steps=20, eps=1e-8)
+    assert approx_equal(
+        grad_descent(
+            f,
+            f_grad,
+            x0,
+            step_adjustment_strategy=strategy,
+            stopping_criterion="argument_margin",
+        ),
+        3,
+    )
+
+
+def test_grad_descent_bracketing():
+    f = lambda x: 50 * (x - 3) ** 2 + 8
+    f_grad = lambda x: 100 * (x - 3)
+    x0 = -6
+
+    for strategy_class in (
+        step.DichotomyStrategy,
+        step.GoldenSectionStrategy,
+        step.BrentStrategy,
+        step.FibonacciStrategy,
+    ):
+        strategy = strategy_class(f, f_grad, max_step=1000, max_steps=50, eps=1e-6)
+        bracketing_strategy = strategy_class(
+            f, f_grad, max_step=1000, max_steps=50, eps=1e-6, bracketing=True
+        )
+        x = grad_descent(f, f_grad, x0, step_adjustment_strategy=bracketing_strategy)
+        assert approx_equal(x, 3, eps=1e-4)
+
+        strategy(x0, step_prev=0.01)
+        bracketing_strategy(x0, step_prev=0.01)
+        assert bracketing_strategy.function_calls < strategy.function_calls
+
+
+def test_bracketing_saves_function_calls():
+    hessian = np.diag([1.0, 10, 100])
+    f = lambda x: np.dot(x, hessian @ x) / 2
+    f_grad = lambda x: hessian @ x
+    x0 = np.ones(3)
+    grad = f_grad(x0)
+    exact_step = np.dot(grad, grad) / np.dot(grad, hessian @ grad)
+
+    for strategy_class in (
+        step.DichotomyStrategy,
+        step.GoldenSectionStrategy,
+        step.BrentStrategy,
+        step.FibonacciStrategy,
+    ):
+        strategy = strategy_class(f, f_grad, max_step=1000)
+        bracketing_strategy = strategy_class(f, f_grad, max_step=1000, bracketing=True)
+        # the bracket around a good step_prev is tight
+        strategy(x0, step_prev=exact_step)
+        bracketing_step = bracketing_strategy(x0, step_prev=exact_step)
+        assert bracketing_strategy.function_calls < strategy.function_calls
+        # 30 iterations narrow [0, 1000] to about 1000 / PHI^30 = 5e-4
+        assert abs(bracketing_step - exact_step) < 1e-3
+
+
+def test_strategy_max_function_calls():
+    f = lambda x: (x - 3) ** 4 + (x - 3) ** 2
+    f_grad = lambda x: 4 * (x - 3) ** 3 + 2 * (x - 3)
+
+    for bracketing in (False, True):
+        strategy = step.GoldenSectionStrategy(
+            f, f_grad, max_step=1000, eps=1e-8, bracketing=bracketing
+        )
+        budget_strategy = step.GoldenSectionStrategy(
+            f,
+            f_grad,
+            max_step=1000,
+            eps=1e-8,
+            bracketing=bracketing,
+            max_function_calls=8,
+        )
+        strategy(-6, step_prev=0.01)
+        budget_strategy(-6, step_prev=0.01)
+        assert strategy.function_calls > 8
+        assert budget_strategy.function_calls <= 8
+
+
+def test_strategy_small_max_function_calls():
+    # from a small step_prev bracketing alone uses up the budget
+    f = lambda x: (x - 3) ** 4 + (x - 3) ** 2
+    f_grad = lambda x: 4 * (x - 3) ** 3 + 2 * (x - 3)
+
+    for strategy_class in (step.GoldenSectionStrategy, step.FibonacciStrategy):
+        for max_function_calls in range(13):
+            calls = 0
+
+            def counting_f(x):
+                nonlocal calls
+                calls += 1
+                return f(x)
+
+            strategy = strategy_class(
+                counting_f,
+                f_grad,
+                max_step=1000,
+                eps=1e-8,
+                bracketing=True,
+                max_function_calls=max_function_calls,
+            )
+            strategy(-6, step_prev=1e-3)
+            assert calls == strategy.function_calls <= max_function_calls
+
+
+def test_grad_descent_warm_start():
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return x[0] ** 2 + 10 * x[1] ** 2 + 5
+
+    f_grad = lambda x: np.array([2 * x[0], 20 * x[1]])
+    x0 = np.array([5, -7])
+
+    for strategy_class in (
+        step.GoldenSectionStrategy,
+        step.BrentStrategy,
+        step.FibonacciStrategy,
+    ):
+        calls = 0
+        strategy = strategy_class(f, f_grad, max_step=1000, max_steps=50, eps=1e-8)
+        grad_descent(f, f_grad, x0, step_adjustment_strategy=strategy)
+        cold_calls = calls
+
+        calls = 0
+        strategy = strategy_class(
+            f, f_grad, max_step=1000, max_steps=50, eps=1e-8, warm_start=True
+        )
+        x = grad_descent(f, f_grad, x0, step_adjustment_strategy=strategy)
+        assert np.all(abs(x) < 1e-5)
+        assert calls < cold_calls
+
+        # the state of the previous run is forgotten
+        calls = 0
+        x = grad_descent(f, f_grad, x0 * 100, step_adjustment_strategy=strategy)
+        assert np.all(abs(x) < 1e-5)
+
+
+def test_one_gradient_per_iteration():
+    f = lambda x: x[0] ** 2 + 10 * x[1] ** 2 + 5
+    x0 = np.array([5, -7])
+
+    for strategy_name in ("divide_step", "golden_section", "fibonacci"):
+        grad_calls = 0
+        iterations = 0
+
+        def f_grad(x):
+            nonlocal grad_calls
+            grad_calls += 1
+            return np.array([2 * x[0], 20 * x[1]])
+
+        def iteration_callback(iteration_no, **kwargs):
+            nonlocal iterations
+            iterations = iteration_no + 1
+
+        if strategy_name == "golden_section":
+            strategy = step.GoldenSectionStrategy(f, f_grad, max_step=1000)
+        elif strategy_name == "fibonacci":
+            strategy = step.FibonacciStrategy(f, f_grad, max_step=1000)
+        else:
+            strategy = strategy_name
+
+        grad_descent(
+            f,
+            f_grad,
+            x0,
+            step_adjustment_strategy=strategy,
+            iteration_callback=iteration_callback,
+        )
+        assert grad_calls == iterations
+
+
+def test_grad_descent_backtracking():
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return x[0] ** 2 + 10 * x[1] ** 2 + 5
+
+    f_grad = lambda x: np.array([2 * x[0], 20 * x[1]])
+    x0 = np.array([5, -7])
+
+    x = grad_descent(f, f_grad, x0, step_adjustment_strategy="divide_step")
+    divide_step_calls = calls
+
+    calls = 0
+    iterations = 0
+
+    def iteration_callback(iteration_no, **kwargs):
+        nonlocal iterations
+        iterations = iteration_no + 1
+
+    x = grad_descent(
+        f,
+        f_grad,
+        x0,
+        step_adjustment_strategy="backtracking",
+        iteration_callback=iteration_callback,
+    )
+    assert np.all(abs(x) < 1e-5)
+    assert calls < divide_step_calls
+    assert calls <= 3 * iterations
+
+
+def test_backtracking_conditions():
+    f = lambda x: (x[0] - 1) ** 4 + x[1] ** 2 + x[0] * x[1]
+    f_grad = lambda x: np.array([4 * (x[0] - 1) ** 3 + x[1], 2 * x[1] + x[0]])
+    x = np.array([3, 2])
+    grad = f_grad(x)
+    c1, c2 = 1e-4, 0.9
+
+    for step_prev in (1e-6, 1e-2, 1, 100):
+        strategy = step.BacktrackingStrategy(f, f_grad, c1=c1, c2=c2, wolfe=True)
+        step_size = strategy(x, step_prev)
+        x_new = x - step_size * grad
+        assert f(x_new) <= f(x) - c1 * step_size * np.dot(grad, grad)
+        assert np.dot(f_grad(x_new), grad) <= c2 * np.dot(grad, grad)
+
+
+def test_grad_descent_barzilai_borwein():
+    hessian = generate_hessian(10, 1000)
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return np.dot(x, hessian @ x) / 2
+
+    f_grad = lambda x: hessian @ x
+    x0 = np.arange(10, dtype=np.float64)
+
+    def run(strategy):
+        iterations = 0
+
+        def iteration_callback(iteration_no, **kwargs):
+            nonlocal iterations
+            iterations = iteration_no + 1
+
+        x = grad_descent(
+            f,
+            f_grad,
+            x0,
+            max_iterations_count=20000,
+            step_adjustment_strategy=strategy,
+            initial_step=1e-3,
+            iteration_callback=iteration_callback,
+        )
+        return x, iterations
+
+    _, divide_step_iterations = run("divide_step")
+    for strategy in (
+        "barzilai_borwein",
+        step.BarzilaiBorweinStrategy(f, f_grad, variant="short"),
+    ):
+        calls = 0
+        x, iterations = run(strategy)
+        assert np.linalg.norm(x) < 1e-3
+        assert iterations * 10 < divide_step_iterations
+        assert calls == 0
+
+
+def test_barzilai_borwein_nonmonotone():
+    # on a non-quadratic function plain steps may overshoot
+    f = lambda x: np.sum(x ** 4) + np.sum(x ** 2)
+    f_grad = lambda x: 4 * x ** 3 + 2 * x
+    x0 = np.array([3.0, -2.0, 1.0])
+
+    strategy = step.BarzilaiBorweinStrategy(f, f_grad, nonmonotone_memory=5)
+    res = grad_descent(f, f_grad, x0, step_adjustment_strategy=strategy)
+    assert np.all(abs(res) < 1e-5)
+
+
+def test_grad_descent_nonmonotone():
+    # Rosenbrock's valley is where monotone steps crawl
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return 100 * (x[1] - x[0] ** 2) ** 2 + (1 - x[0]) ** 2
+
+    f_grad = lambda x: np.array(
+        [-400 * x[0] * (x[1] - x[0] ** 2) - 2 * (1 - x[0]), 200 * (x[1] - x[0] ** 2)]
+    )
+    x0 = np.array([-1.2, 1.0])
+
+    grad_descent(f, f_grad, x0, eps=1e-8, max_iterations_count=100000)
+    divide_step_calls = calls
+
+    for strategy in (
+        step.NonmonotoneStrategy(f, f_grad, eps=1e-8),
+        step.NonmonotoneStrategy(f, f_grad, memory=5, spectral=False, eps=1e-8),
+    ):
+        calls = 0
+        trial_calls = 0
+
+        def iteration_callback(iteration_no, **kwargs):
+            nonlocal trial_calls
+            if iteration_no > 0:
+                trial_calls += strategy.function_calls
+
+        res = grad_descent(
+            f,
+            f_grad,
+            x0,
+            eps=1e-8,
+            max_iterations_count=100000,
+            step_adjustment_strategy=strategy,
+            iteration_callback=iteration_callback,
+        )
+        assert np.linalg.norm(res - np.array([1.0, 1.0])) < 1e-3
+        # f at the next point is taken from the accepted trial
+        assert calls == trial_calls + strategy.function_calls
+
+    calls = 0
+    grad_descent(
+        f,
+        f_grad,
+        x0,
+        eps=1e-8,
+        max_iterations_count=100000,
+        step_adjustment_strategy="nonmonotone",
+    )
+    assert calls * 10 < divide_step_calls
+
+
+def test_grad_descent_quadratic():
+    n = 10
+    hessian = generate_hessian(n, 100)
+    Q = hessian_of_fn(hessian)
+    fn = fn_from_hessian(hessian, n)
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return fn(x)
+
+    f_grad = lambda x: Q @ x
+    x0 = np.arange(n, dtype=np.float64)
+
+    x = grad_descent(f, f_grad, x0, step_adjustment_strategy="quadratic", Q=Q)
+    assert np.linalg.norm(x) < 1e-5
+    assert calls == 0
+
+    strategy = step.QuadraticStrategy(f, f_grad, lambda v: Q @ v)
+    x = grad_descent(f, f_grad, x0, step_adjustment_strategy=strategy)
+    assert np.linalg.norm(x) < 1e-5
+
+    # the step is the exact minimum along the gradient
+    grad = f_grad(x0)
+    step_size = strategy(x0, 1)
+    assert approx_equal(np.dot(f_grad(x0 - step_size * grad), grad), 0, eps=1e-6)
+
+
+def test_grad_descent_batch():
+    hessian = generate_hessian(5, 10)
+    Q = hessian_of_fn(hessian)
+    rows_seen = []
+
+    def f(x):
+        rows_seen.append(len(x))
+        return np.einsum("ij,jk,ik->i", x, Q, x) / 2
+
+    f_grad = lambda x: x @ Q
+    x0 = np.random.default_rng(0).uniform(-100, 100, (20, 5))
+    x0[0] = 0  # converges at once
+
+    for stopping_criterion in ("argument_margin", "function_margin"):
+        rows_seen.clear()
+        res = grad_descent_batch(f, f_grad, x0, stopping_criterion=stopping_criterion)
+        assert res.shape == x0.shape
+        for x0_row, res_row in zip(x0, res):
+            expected = grad_descent(
+                lambda x: f(x[np.newaxis])[0],
+                lambda x: f_grad(x[np.newaxis])[0],
+                x0_row,
+                stopping_criterion=stopping_criterion,
+            )
+            assert np.allclose(res_row, expected)
+        # the converged rows drop out
+        assert min(rows_seen) < len(x0)
+
+
+def test_grad_descent_f_and_grad():
+    hessian = generate_hessian(5, 10)
+    Q = hessian_of_fn(hessian)
+    fn = fn_from_hessian(hessian, 5)
+    f_grad = lambda x: Q @ x
+    x0 = np.arange(5, dtype=np.float64)
+    points = []
+
+    def f_and_grad(x):
+        points.append(x)
+        return fn(x), f_grad(x)
+
+    for strategy in ("divide_step", "backtracking", "nonmonotone"):
+        for stopping_criterion in ("argument_margin", "function_margin"):
+            points.clear()
+            res = grad_descent(
+                None,
+                None,
+                x0,
+                step_adjustment_strategy=strategy,
+                stopping_criterion=stopping_criterion,
+                f_and_grad=f_and_grad,
+            )
+            expected = grad_descent(
+                fn,
+                f_grad,
+                x0,
+                step_adjustment_strategy=strategy,
+                stopping_criterion=stopping_criterion,
+            )
+            assert np.allclose(res, expected)
+            # no point is evaluated twice in a row
+            for p, q in zip(points, points[1:]):
+                assert not np.array_equal(p, q)
+
+
+def test_grad_descent_acceleration():
+    hessian = generate_hessian(20, 1000)
+    f = lambda x: np.dot(x, hessian @ x) / 2
+    f_grad = lambda x: hessian @ x
+    x0 = np.arange(20, dtype=np.float64)
+
+    def run(acceleration, **kwargs):
+        iterations = 0
+
+        def iteration_callback(iteration_no, **kwargs):
+            nonlocal iterations
+            iterations = iteration_no + 1
+
+        x = grad_descent(
+            f,
+            f_grad,
+            x0,
+            max_iterations_count=20000,
+            step_adjustment_strategy="quadratic",
+            Q=hessian,
+            acceleration=acceleration,
+            iteration_callback=iteration_callback,
+            **kwargs,
+        )
+        return x, iterations
+
+    _, plain_iterations = run(None)
+    for acceleration in ("heavy_ball", "nesterov_restart"):
+        for stopping_criterion in ("argument_margin", "function_margin"):
+            x, iterations = run(acceleration, stopping_criterion=stopping_criterion)
+            assert f(x) < 1e-3
+            assert iterations * 5 < plain_iterations
+
+    x, _ = run("nesterov", stopping_criterion="n_iterations")
+    assert f(x) < f(x0) * 1e-6
+
+
+def test_grad_descent_acceleration_default_strategy():
+    hessian = generate_hessian(20, 1000)
+    f = lambda x: np.dot(x, hessian @ x) / 2
+    f_grad = lambda x: hessian @ x
+    x0 = np.arange(20, dtype=np.float64)
+
+    def run(acceleration):
+        states = iter_grad_descent(
+            f, f_grad, x0, max_iterations_count=20000, acceleration=acceleration
+        )
+        return [state.fx for state in states]
+
+    plain = run(None)
+    for acceleration in ("nesterov", "nesterov_restart"):
+        values = run(acceleration)
+        # divide_step accepts any decrease, FISTA needs a sufficient one
+        assert max(values) <= f(x0)
+        assert values[-1] < 1e-2
+    assert len(run("nesterov_restart")) < len(plain)
+
+
+def test_grad_descent_nesterov_reaches_minimum():
+    hessians = [np.diag([1.0, 10, 100]), generate_hessian(20, 1000)]
+    for hessian in hessians:
+        f = lambda x: np.dot(x, hessian @ x) / 2
+        f_grad = lambda x: hessian @ x
+        for strategy in ("backtracking", "divide_step"):
+            result = grad_descent(
+                f,
+                f_grad,
+                np.ones(len(hessian)),
+                max_iterations_count=20000,
+                step_adjustment_strategy=strategy,
+                acceleration="nesterov",
+                telemetry=True,
+            )
+            assert result.termination == "converged"
+            assert result.fx < 1e-8
+
+
+def test_grad_descent_heavy_ball_rosenbrock():
+    f = lambda x: 100 * (x[1] - x[0] ** 2) ** 2 + (1 - x[0]) ** 2
+    f_grad = lambda x: np.array(
+        [
+            400 * x[0] ** 3 + 2 * x[0] - 400 * x[0] * x[1] - 2,
+            -200 * x[0] ** 2 + 200 * x[1],
+        ]
+    )
+
+    for strategy in ("backtracking", "divide_step"):
+        x = grad_descent(
+            f,
+            f_grad,
+            np.array([-1.2, 1]),
+            max_iterations_count=20000,
+            step_adjustment_strategy=strategy,
+            acceleration="heavy_ball",
+        )
+        assert np.all(abs(x - 1) < 1e-3)
+
+
+def test_grad_descent_in_place():
+    hessian = generate_hessian(10, 100)
+    f = lambda x: np.dot(x, hessian @ x) / 2
+    outs = []
+
+    def f_grad(x, out=None):
+        outs.append(out)
+        return np.matmul(hessian, x, out=out)
+
+    x0 = np.arange(10, dtype=np.float64)
+
+    # Barzilai-Borwein keeps the previous point and gradient
+    for strategy in ("divide_step", "barzilai_borwein", "backtracking"):
+        for stopping_criterion in ("argument_margin", "function_margin"):
+            outs.clear()
+            res = grad_descent(
+                f,
+                f_grad,
+                x0,
+                step_adjustment_strategy=strategy,
+                stopping_criterion=stopping_criterion,
+                in_place=True,
+            )
+            expected = grad_descent(
+                f,
+                f_grad,
+                x0,
+                step_adjustment_strategy=strategy,
+                stopping_criterion=stopping_criterion,
+            )
+            assert np.allclose(res, expected)
+            # two gradient buffers are reused
+            assert len({id(out) for out in outs if out is not None}) == 2
+    assert np.all(x0 == np.arange(10))
+
+
+def test_iter_grad_descent():
+    f = lambda x: np.sum((x - 3) ** 2) + 8
+    f_grad = lambda x: 2 * (x - 3)
+    x0 = np.zeros(3)
+
+    states = list(iter_grad_descent(f, f_grad, x0, initial_step=0.1))
+    assert np.all(states[-1].x == grad_descent(f, f_grad, x0, initial_step=0.1))
+    assert [state.iteration_no for state in states] == list(range(len(states)))
+
+    # a run can be stopped at any iteration, the state is computed lazily
+    prev_fx = f(x0)
+    for state in iter_grad_descent(f, f_grad, x0, initial_step=0.1):
+        grad_calls = state.grad_calls
+        assert state.fx < prev_fx
+        assert state.grad_norm == np.linalg.norm(f_grad(state.x))
+        # the gradient at x is the one the next iteration needs
+        assert state.grad_calls == grad_calls + 1
+        assert state.f_calls > 0
+        prev_fx = state.fx
+        if state.grad_norm < 1e-2:
+            break
+    assert state.iteration_no < states[-1].iteration_no
+
+
+def test_grad_descent_telemetry():
+    f = lambda x: np.sum((x - 3) ** 2) + 8
+    f_grad = lambda x: 2 * (x - 3)
+    x0 = np.zeros(3)
+
+    iterations = 0
+
+    def iteration_callback(iteration_no, **kwargs):
+        nonlocal iterations
+        iterations = iteration_no + 1
+
+    res = grad_descent(
+        f, f_grad, x0, iteration_callback=iteration_callback, telemetry=True
+    )
+    assert np.all(res.x == grad_descent(f, f_grad, x0))
+    assert approx_equal(res.fx, 8)
+    assert res.iterations == iterations
+    assert res.termination == "converged"
+    assert res.grad_calls == res.iterations
+    assert res.f_calls > res.iterations
+    assert res.hessian_calls == 0
+    assert set(res.times) == {"strategy", "update", "total"}
+    assert res.times["strategy"] + res.times["update"] <= res.times["total"]
+
+    res = grad_descent(
+        f, f_grad, x0, initial_step=0.1, max_iterations_count=3, telemetry=True
+    )
+    assert res.iterations == 3
+    assert res.termination == "max_iterations"
+
+
+def test_grad_descent_numerical_gradient():
+    f = lambda x: (x[0] - 3) ** 2 + 10 * (x[1] + 1) ** 2
+    x0 = np.zeros(2)
+
+    res = grad_descent(f, None, x0, step_adjustment_strategy="backtracking")
+    assert np.allclose(res, [3, -1], atol=1e-5)
+
+
 def test_grad_descent_iteration_callback():
     f = lambda x: x ** 2 - 5
     f_grad = lambda x: 2 * x
@@ -154,3 +789,54 @@ def test_on_inverse_hyperbole():
     )
 
     assert approx_equal(res2, actual_res, 1e-4)
+
+
+
+def test_strategy_objects_use_oracle():
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return x[0] ** 2 + 3 * x[1] ** 2
+
+    f_grad = lambda x: np.array([2 * x[0], 6 * x[1]])
+    x0 = np.array([3.0, 4.0])
+
+    grad_descent(f, f_grad, x0, step_adjustment_strategy="divide_step")
+    named_calls, calls = calls, 0
+    strategy = step.DivideStepStrategy(f, f_grad)
+    grad_descent(f, f_grad, x0, step_adjustment_strategy=strategy)
+    # cached the same way as a strategy made by name
+    assert calls == named_calls
+    assert strategy.f is f and strategy.f_grad is f_grad
+
+
+def test_telemetry_counts_strategy_calls():
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return x[0] ** 2 + 3 * x[1] ** 2
+
+    f_grad = lambda x: np.array([2 * x[0], 6 * x[1]])
+    x0 = np.array([3.0, 4.0])
+
+    for strategy in (
+        step.DivideStepStrategy(f, f_grad),
+        step.GoldenSectionStrategy(f, f_grad, 10),
+    ):
+        calls = 0
+        for state in iter_grad_descent(
+            f, f_grad, x0, step_adjustment_strategy=strategy
+        ):
+            assert state.f_calls == calls
+        assert state.f_calls > 0
+
+        calls = 0
+        res = grad_descent(
+            f, f_grad, x0, step_adjustment_strategy=strategy, telemetry=True
+        )
+        # f(x) of the result, if not cached, is found after the counts
+        assert calls - 1 <= res.f_calls <= calls
@@ -0,0 +1,61 @@
+import numpy as np
+
+from methopt.multistart import multistart
+
+EPS = 1e-3
+
+
+def approx_equal(a, b, eps=EPS):
+    return np.all(abs(a - b) < eps)
+
+
+# Rosenbrock function
+f = lambda x: 100 * (x[1] - x[0] ** 2) ** 2 + (1 - x[0]) ** 2
+grad = lambda x: np.array(
+    [
+        400 * x[0] ** 3 + 2 * x[0] - 400 * x[0] * x[1] - 2,
+        -200 * x[0] ** 2 + 200 * x[1],
+    ]
+)
+H = lambda x: np.array(
+    [[1200 * x[0] ** 2 + 2 - 400 * x[1], -400 * x[0]], [-400 * x[0], 200]]
+)
+x0s = [[0, 0], [-1, -1], [1, -1], [1.87, -2.3], [1.2, 1.67]]
+
+
+def test_every_start():
+    results = dict(multistart("newtons_method", f, grad, x0s, workers=2, f_H=H))
+
+    assert sorted(results) == list(range(len(x0s)))
+    for result in results.values():
+        assert result.termination == "converged"
+        assert approx_equal(result.x, [1, 1])
+
+
+def test_quadratic():
+    # f = x^2 + 2y^2
+    f = lambda x: x[0] ** 2 + 2 * x[1] ** 2
+    grad = lambda x: np.array([2 * x[0], 4 * x[1]])
+
+    for method in ("grad_descent", "conjugate_direction_method"):
+        results = list(multistart(method, f, grad, x0s, workers=2))
+        assert len(results) == len(x0s)
+        for i, result in results:
+            assert approx_equal(result.x, [0, 0])
+
+
+def test_target():
+    results = list(
+        multistart(
+            "grad_descent",
+            f,
+            grad,
+            x0s * 4,
+            workers=2,
+            target=1e-3,
+            max_iterations_count=100000,
+        )
+    )
+
+    assert len(results) < len(x0s) * 4
+    assert results[-1][1].fx <= 1e-3
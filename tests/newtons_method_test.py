@@ -1,6 +1,10 @@
 import numpy as np
 
-from methopt.newtons_method import newtons_method
+from methopt.newtons_method import (
+    CholeskyDirection,
+    iter_newtons_method,
+    newtons_method,
+)
 
 EPS = 1e-3
 
@@ -101,3 +105,144 @@ def test_iteration_callback():
     assert approx_equal(first_fx, 3000)
     assert approx_equal(last_x, [-0.636601, -0.62732])
     assert approx_equal(last_fx, -3.66907)
+
+
+def test_f_and_grad():
+    # f = x^4 + x^2 + 6x
+    points = []
+
+    def f_and_grad(x):
+        points.append(tuple(x))
+        fx = x[0] ** 4 + x[0] ** 2 + 6 * x[0]
+        return fx, np.array([4 * x[0] ** 3 + 2 * x[0] + 6])
+
+    H = lambda x: np.array([[4 * 3 * x[0] ** 2 + 2]])
+    x0 = np.array([3.0])
+
+    res = newtons_method(None, H, None, x0, f_and_grad=f_and_grad)
+    assert approx_equal(res, [-1])
+    # no point is evaluated twice in a row
+    assert all(p != q for p, q in zip(points, points[1:]))
+
+
+def test_in_place():
+    # f = sum(x^4 + x^2 + 6x)
+    f = lambda x: np.sum(x ** 4 + x ** 2 + 6 * x)
+    H = lambda x: np.diag(12 * x ** 2 + 2)
+    outs = []
+
+    def grad(x, out=None):
+        outs.append(out)
+        if out is None:
+            out = np.empty_like(x)
+        np.multiply(x, x, out=out)
+        out *= 4 * x
+        out += 2 * x + 6
+        return out
+
+    x0 = np.array([3.0, -2.0, 0.5])
+
+    res = newtons_method(f, H, grad, x0, in_place=True)
+    assert approx_equal(res, [-1, -1, -1])
+    assert approx_equal(res, newtons_method(f, H, grad, x0))
+    # one gradient buffer is reused
+    assert len({id(out) for out in outs if out is not None}) == 1
+    assert np.all(x0 == [3.0, -2.0, 0.5])
+
+
+def test_iter_newtons_method():
+    # f = x^4 + x^2 + 6x
+    f = lambda x: x[0] ** 4 + x[0] ** 2 + 6 * x[0]
+    H = lambda x: np.array([[4 * 3 * x[0] ** 2 + 2]])
+    grad = lambda x: np.array([4 * x[0] ** 3 + 2 * x[0] + 6])
+    x0 = np.array([3])
+
+    states = list(iter_newtons_method(f, H, grad, x0))
+    assert approx_equal(states[-1].x, newtons_method(f, H, grad, x0))
+    assert approx_equal(states[-1].x, [-1])
+    assert states[-1].grad_norm < 1e-3
+    assert [state.iteration_no for state in states] == list(range(1, len(states) + 1))
+
+
+def test_telemetry():
+    # f = x^4 + x^2 + 6x
+    f = lambda x: x[0] ** 4 + x[0] ** 2 + 6 * x[0]
+    H = lambda x: np.array([[4 * 3 * x[0] ** 2 + 2]])
+    grad = lambda x: np.array([4 * x[0] ** 3 + 2 * x[0] + 6])
+    x0 = np.array([3])
+
+    res = newtons_method(f, H, grad, x0, telemetry=True)
+    assert approx_equal(res.x, [-1])
+    assert approx_equal(res.fx, -4)
+    assert res.termination == "converged"
+    assert res.hessian_calls == res.grad_calls == res.iterations
+    assert set(res.times) == {"direction", "strategy", "update", "total"}
+
+
+def test_finite_differences():
+    # f = 4x^6 + 10z^2 - 4xz + 10z
+    f = lambda x: 4 * x[0] ** 6 + 10 * x[1] ** 2 - 4 * x[0] * x[1] + 10 * x[1]
+    grad = lambda x: np.array([24 * x[0] ** 5 - 4 * x[1], 20 * x[1] - 4 * x[0] + 10])
+    x0 = np.array([3, 3], dtype=np.float64)
+
+    assert approx_equal(newtons_method(f, None, grad, x0), [-0.636601, -0.62732])
+    assert approx_equal(newtons_method(f, None, None, x0), [-0.636601, -0.62732])
+
+
+def test_cholesky_direction():
+    H = np.array([[4.0, 1.0, 0.0], [1.0, 3.0, 1.0], [0.0, 1.0, 2.0]])
+    grad = np.array([1.0, -2.0, 3.0])
+    direction = CholeskyDirection()
+
+    assert approx_equal(direction(H, grad), -np.linalg.solve(H, grad), 1e-12)
+    assert approx_equal(direction(H, -grad), np.linalg.solve(H, grad), 1e-12)
+    assert direction.factorizations == 1
+
+    direction(H + 1e-3, grad)
+    assert direction.factorizations == 2
+
+
+def test_cholesky_direction_tol():
+    H = np.array([[4.0, 1.0], [1.0, 3.0]])
+    grad = np.array([1.0, -2.0])
+    direction = CholeskyDirection(tol=1e-2)
+
+    direction(H, grad)
+    # the factor of H is reused
+    assert approx_equal(direction(H + 1e-3, grad), -np.linalg.solve(H, grad), 1e-12)
+    assert direction.factorizations == 1
+
+    direction(H + 1, grad)
+    assert direction.factorizations == 2
+
+
+def test_cholesky_direction_indefinite():
+    H = np.array([[1.0, 2.0], [2.0, 1.0]])
+    for grad in ([1.0, 0.0], [0.0, 1.0], [1.0, 1.0], [-1.0, 1.0]):
+        # still a descent direction
+        assert np.dot(CholeskyDirection()(H, np.array(grad)), grad) < 0
+
+
+def test_linear_solvers():
+    # f = (x^2 + z^2)^2 + z^3
+    f = lambda x: (x[0] ** 2 + x[1] ** 2) ** 2 + x[1] ** 3
+    H = lambda x: np.array(
+        [
+            [12 * x[0] ** 2 + 4 * x[1] ** 2, 8 * x[1] * x[0]],
+            [8 * x[1] * x[0], 4 * x[0] ** 2 + 12 * x[1] ** 2 + 6 * x[1]],
+        ]
+    )
+    grad = lambda x: np.array(
+        [
+            2 * (x[0] ** 2 + x[1] ** 2) * 2 * x[0],
+            2 * (x[0] ** 2 + x[1] ** 2) * 2 * x[1] + 3 * x[1] ** 2,
+        ]
+    )
+    x0 = np.array([-1.5, -1.5])
+
+    for kwargs in (
+        dict(linear_solver="conjugate_directions"),
+        dict(linear_solver="cholesky"),
+        dict(hessian_tol=0.1),
+    ):
+        assert approx_equal(newtons_method(f, H, grad, x0, **kwargs), [0, -0.75])
@@ -1,8 +1,22 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
 from src.methopt.one_dimensional_methods import (
     dichotomy,
     golden_section,
     fibonacci_method,
-    pre_calc_for_fibonacci_method,
+    fibonacci_table,
+    find_n,
+    brent,
+    k_section,
+    sweep_epsilons,
+    bracket,
+    EvaluationCache,
+    dichotomy_batch,
+    golden_section_batch,
+    fibonacci_method_batch,
 )
 
 EPSILONS = [0.5, 1e-1, 1e-2, 1e-3, 1e-4, 1e-5, 1e-6, 1e-7]
@@ -23,10 +37,12 @@ def internal_test_function(
             x, _, _ = dichotomy(eps, a0, b0, f, max_steps)
         elif method_name == "golden_section":
             x, _, _ = golden_section(eps, a0, b0, f, max_steps)
+        elif method_name == "brent":
+            x, _, _ = brent(eps, a0, b0, f, max_steps)
+        elif method_name == "k_section":
+            x, _, _ = k_section(eps, a0, b0, f, max_steps)
         else:
-            x, _, _ = fibonacci_method(
-                eps, a0, b0, f, max_steps, pre_calc_for_fibonacci_method(max_steps)
-            )
+            x, _, _ = fibonacci_method(eps, a0, b0, f, max_steps)
         assert approx_equal(x, x_ans, eps)
 
 
@@ -37,6 +53,8 @@ def test_parabole1():
     b0 = 500
     internal_test_function(f, x_ans, a0, b0, "dichotomy")
     internal_test_function(f, x_ans, a0, b0, "golden_section")
+    internal_test_function(f, x_ans, a0, b0, "brent")
+    internal_test_function(f, x_ans, a0, b0, "k_section")
     internal_test_function(f, x_ans, a0, b0, "fibonacci")
 
 
@@ -48,6 +66,8 @@ def test_parabole2():
     max_steps = 1000
     internal_test_function(f, x_ans, a0, b0, "dichotomy", max_steps)
     internal_test_function(f, x_ans, a0, b0, "golden_section", max_steps)
+    internal_test_function(f, x_ans, a0, b0, "brent", max_steps)
+    internal_test_function(f, x_ans, a0, b0, "k_section", max_steps)
     internal_test_function(f, x_ans, a0, b0, "fibonacci", max_steps)
 
 
@@ -58,6 +78,8 @@ def test_parabole3():
     b0 = 1000
     internal_test_function(f, x_ans, a0, b0, "dichotomy")
     internal_test_function(f, x_ans, a0, b0, "golden_section")
+    internal_test_function(f, x_ans, a0, b0, "brent")
+    internal_test_function(f, x_ans, a0, b0, "k_section")
     internal_test_function(f, x_ans, a0, b0, "fibonacci")
 
 
@@ -68,6 +90,8 @@ def test_line():
     b0 = 100
     internal_test_function(f, x_ans, a0, b0, "dichotomy")
     internal_test_function(f, x_ans, a0, b0, "golden_section")
+    internal_test_function(f, x_ans, a0, b0, "brent")
+    internal_test_function(f, x_ans, a0, b0, "k_section")
     internal_test_function(f, x_ans, a0, b0, "fibonacci")
 
 
@@ -78,6 +102,8 @@ def test_sqrt():
     b0 = 500
     internal_test_function(f, x_ans, a0, b0, "dichotomy")
     internal_test_function(f, x_ans, a0, b0, "golden_section")
+    internal_test_function(f, x_ans, a0, b0, "brent")
+    internal_test_function(f, x_ans, a0, b0, "k_section")
     internal_test_function(f, x_ans, a0, b0, "fibonacci")
 
 
@@ -88,6 +114,8 @@ def test_hard_f1():
     b0 = 500
     internal_test_function(f, x_ans, a0, b0, "dichotomy")
     internal_test_function(f, x_ans, a0, b0, "golden_section")
+    internal_test_function(f, x_ans, a0, b0, "brent")
+    internal_test_function(f, x_ans, a0, b0, "k_section")
     internal_test_function(f, x_ans, a0, b0, "fibonacci")
 
 
@@ -98,6 +126,8 @@ def test_hard_f2():
     b0 = 5000
     internal_test_function(f, x_ans, a0, b0, "dichotomy")
     internal_test_function(f, x_ans, a0, b0, "golden_section")
+    internal_test_function(f, x_ans, a0, b0, "brent")
+    internal_test_function(f, x_ans, a0, b0, "k_section")
     internal_test_function(f, x_ans, a0, b0, "fibonacci")
 
 
@@ -108,4 +138,185 @@ def test_hard_f3():
     b0 = 1
     internal_test_function(f, x_ans, a0, b0, "dichotomy")
     internal_test_function(f, x_ans, a0, b0, "golden_section")
+    internal_test_function(f, x_ans, a0, b0, "brent")
+    internal_test_function(f, x_ans, a0, b0, "k_section")
     internal_test_function(f, x_ans, a0, b0, "fibonacci")
+
+
+def internal_test_batch(method, batch_method, *args, max_steps=MAX_STEPS):
+    f = lambda x: (x - 3) ** 2 + 8
+    a0 = np.array([-500, 0, 2.9, -1, 4])
+    b0 = np.array([500, 1000, 3.1, 10, 100])
+    for eps in EPSILONS:
+        xs, iterations, calls = batch_method(eps, a0, b0, f, max_steps, *args)
+        for i in range(len(a0)):
+            x, iterations_i, calls_i = method(eps, a0[i], b0[i], f, max_steps, *args)
+            assert approx_equal(xs[i], x, 1e-12)
+            assert iterations[i] == iterations_i
+            assert calls[i] == calls_i
+
+
+def test_dichotomy_batch():
+    internal_test_batch(dichotomy, dichotomy_batch)
+
+
+def test_golden_section_batch():
+    internal_test_batch(golden_section, golden_section_batch)
+
+
+def test_fibonacci_batch():
+    internal_test_batch(fibonacci_method, fibonacci_method_batch)
+
+
+def test_batch_few_steps():
+    for max_steps in (0, 1, 2):
+        internal_test_batch(dichotomy, dichotomy_batch, max_steps=max_steps)
+        internal_test_batch(golden_section, golden_section_batch, max_steps=max_steps)
+        internal_test_batch(
+            fibonacci_method, fibonacci_method_batch, max_steps=max_steps
+        )
+
+
+def test_batch_calls_f_once_per_iteration():
+    calls = 0
+
+    def f(x):
+        nonlocal calls
+        calls += 1
+        return (x - 3) ** 2 + 8
+
+    a0 = np.full(1000, -500.0)
+    b0 = np.linspace(10, 1000, 1000)
+    xs, iterations, _ = golden_section_batch(1e-6, a0, b0, f, MAX_STEPS)
+    assert np.all(np.abs(xs - 3) <= 1e-6)
+    assert calls <= np.max(iterations) + 2
+
+
+def test_brent_needs_fewer_calls_on_smooth_functions():
+    f = lambda x: (x - 1) / (1 - x ** 3)
+    for eps in EPSILONS[2:]:
+        x, _, calls = brent(eps, -500, 500, f, MAX_STEPS)
+        _, _, golden_calls = golden_section(eps, -500, 500, f, MAX_STEPS)
+        assert approx_equal(x, -0.5, eps)
+        assert calls < golden_calls
+
+
+def test_sweep_epsilons():
+    functions = [
+        (lambda x: (x - 3) ** 2 + 8, -500, 500),
+        (lambda x: -x, 0, 100),
+        (lambda x: (x - 1) / (1 - x ** 3), -1, 1),
+        (lambda x: 0, 0, 1),
+    ]
+    for f, a0, b0 in functions:
+        for method in (dichotomy, golden_section):
+            results = sweep_epsilons(method, EPSILONS, a0, b0, f, MAX_STEPS)
+            for eps in EPSILONS:
+                assert results[eps] == method(eps, a0, b0, f, MAX_STEPS)
+
+
+def test_find_n():
+    fibonacci, _ = fibonacci_table(200)
+    for n in range(1, 200):
+        for len_ab in (fibonacci[n] * 0.999 / 2, fibonacci[n] * 1.001 / 2):
+            expected = next(m for m in range(1, 201) if 2 * len_ab < fibonacci[m])
+            assert find_n(len_ab, 1, 1000) == expected
+            assert find_n(len_ab, 1, 10) == min(expected, 10)
+
+
+def test_fibonacci_more_than_52_steps():
+    f = lambda x: (x - 3) ** 2 + 8
+    eps = 1e-9
+    x, iterations, _ = fibonacci_method(eps, -1e6, 1e6, f, 1000)
+    assert iterations > 52
+    assert approx_equal(x, 3, 1e-5)
+
+
+def test_bracket():
+    for x_ans in (1e-4, 0.01, 3, 700):
+        f = lambda x: (x - x_ans) ** 2
+        for x0 in (1e-3, 1, 1000):
+            a, b, _ = bracket(f, x0, 1000, 1e-8, MAX_STEPS)
+            assert 0 <= a <= x_ans <= b <= 1000
+            assert b - a <= 4 * max(x_ans, x0)
+
+
+def test_bracket_minimum_at_zero():
+    f = lambda x: x
+    a, b, _ = bracket(f, 1, 1000, 1e-8, MAX_STEPS)
+    assert a == 0
+    assert b <= 2e-8
+
+
+def test_k_section_shrink_rate():
+    f = lambda x: (x - 3) ** 2 + 8
+    for k in (2, 3, 8):
+        eps = 1e-3
+        x, iterations, calls = k_section(eps, -500, 500, f, MAX_STEPS, k=k)
+        assert approx_equal(x, 3, eps)
+        assert 1000 * (2 / (k + 1)) ** iterations <= 2 * eps
+        assert calls <= iterations * k
+
+
+def test_k_section_evaluates_in_parallel():
+    barrier = threading.Barrier(4, timeout=5)
+
+    def f(x):
+        barrier.wait()  # deadlocks unless all 4 points are evaluated at once
+        return (x - 3) ** 2 + 8
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        x, _, _ = k_section(1e-3, -500, 500, f, MAX_STEPS, k=4, executor=executor)
+    assert approx_equal(x, 3, 1e-3)
+
+
+class CountingFunction:
+    def __init__(self, f):
+        self.f = f
+        self.calls = 0
+
+    def __call__(self, x):
+        self.calls += 1
+        return self.f(x)
+
+
+ONE_DIM_METHODS = [dichotomy, golden_section, brent, k_section, fibonacci_method]
+
+
+def test_function_calls_are_counted_exactly():
+    for method in ONE_DIM_METHODS:
+        for eps in EPSILONS:
+            f = CountingFunction(lambda x: (x - 1) / (1 - x ** 3))
+            _, _, calls = method(eps, -500, 500, f, MAX_STEPS)
+            assert calls == f.calls
+
+
+def test_max_function_calls():
+    for method in ONE_DIM_METHODS:
+        for max_function_calls in (0, 1, 2, 3, 4, 9, 20):
+            f = CountingFunction(lambda x: (x - 3) ** 2 + 8)
+            _, _, calls = method(
+                1e-7, -500, 500, f, MAX_STEPS, max_function_calls=max_function_calls
+            )
+            assert calls == f.calls <= max_function_calls
+
+
+def test_bracket_max_function_calls():
+    for max_function_calls in range(5):
+        f = CountingFunction(lambda x: (x - 3) ** 2 + 8)
+        _, _, calls = bracket(
+            f, 1e-3, 1000, 1e-8, MAX_STEPS, max_function_calls=max_function_calls
+        )
+        assert calls == f.calls <= max_function_calls
+
+
+def test_shared_cache():
+    for method in ONE_DIM_METHODS:
+        f = CountingFunction(lambda x: (x - 3) ** 2 + 8)
+        cache = EvaluationCache(max_size=1000)
+        x1, iterations1, calls1 = method(1e-5, -500, 500, f, MAX_STEPS, cache=cache)
+        x2, iterations2, calls2 = method(1e-5, -500, 500, f, MAX_STEPS, cache=cache)
+        assert x1 == x2
+        assert iterations1 == iterations2
+        assert calls1 == f.calls
+        assert calls2 == 0
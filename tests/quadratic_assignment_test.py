@@ -4,7 +4,8 @@ import numpy as np
 from methopt.quadratic_assignment import (
     generate_hessian,
     fn_from_hessian,
-    grad_from_hessian
+    grad_from_hessian,
+    hessian_of_fn,
 )
 
 EPS = 1e-7
@@ -70,3 +71,16 @@ def test_grad_from_hessian():
     assert grad[2]([0, 0, 1]) == 7 * 2
 
     assert grad[0]([5, 666, 0]) == 2 * 10 * 5 + 12 * 666
+
+
+def test_hessian_of_fn():
+    hess = [
+        [10, 12, 11],
+        [12, 14, 18],
+        [11, 18,  7]
+    ]
+    grad = grad_from_hessian(hess, 3)
+    Q = hessian_of_fn(hess)
+    x = np.array([5, -3, 2])
+    assert np.all(Q @ x == [gr(x) for gr in grad])
+    assert fn_from_hessian(hess, 3)(x) == np.dot(Q @ x, x) / 2
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import methopt.step_adjustment_strategy as strat
+from methopt.grad_descent import GradDescentException
+from methopt.quasi_newton import bfgs, iter_lbfgs, lbfgs
+
+EPS = 1e-5
+
+
+def approx_equal(a, b, eps=EPS):
+    return np.all(abs(a - b) < eps)
+
+
+# Rosenbrock function
+f = lambda x: 100 * (x[1] - x[0] ** 2) ** 2 + (1 - x[0]) ** 2
+grad = lambda x: np.array(
+    [
+        400 * x[0] ** 3 + 2 * x[0] - 400 * x[0] * x[1] - 2,
+        -200 * x[0] ** 2 + 200 * x[1],
+    ]
+)
+
+
+@pytest.mark.parametrize("method", [bfgs, lbfgs])
+@pytest.mark.parametrize("strategy", ["backtracking", "divide_step"])
+@pytest.mark.parametrize("x0", [[0, 0], [-1, -1], [1.87, -2.3], [-1.2, 1]])
+def test_rosenbrock(method, strategy, x0):
+    res = method(f, grad, x0, step_adjustment_strategy=strategy)
+    assert approx_equal(res, [1, 1])
+
+
+@pytest.mark.parametrize("method", [bfgs, lbfgs])
+def test_one_dimensional_strategy(method):
+    strategy = strat.GoldenSectionStrategy(f, grad, max_step=2, eps=1e-9)
+    res = method(f, grad, [-1.2, 1], step_adjustment_strategy=strategy)
+    assert approx_equal(res, [1, 1])
+
+
+def test_quadratic():
+    # f = 0.5 (Qx, x) - (b, x), minimum at Q^-1 b
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((20, 20))
+    Q = A @ A.T + np.eye(20)
+    b = rng.standard_normal(20)
+    f = lambda x: 0.5 * x @ Q @ x - b @ x
+    grad = lambda x: Q @ x - b
+
+    x_min = np.linalg.solve(Q, b)
+    assert approx_equal(bfgs(f, grad, np.zeros(20)), x_min)
+    assert approx_equal(lbfgs(f, grad, np.zeros(20), memory=5), x_min)
+
+
+def test_large():
+    # extended Rosenbrock function, no Hessian can be afforded
+    n = 1000
+
+    def f_and_grad(x):
+        t = x[1:] - x[:-1] ** 2
+        fx = np.sum(100 * t ** 2 + (1 - x[:-1]) ** 2)
+        g = np.zeros_like(x)
+        g[:-1] = -400 * x[:-1] * t - 2 * (1 - x[:-1])
+        g[1:] += 200 * t
+        return fx, g
+
+    x0 = np.full(n, -1.0)
+    x0[::2] = -1.2
+
+    res = lbfgs(None, None, x0, f_and_grad=f_and_grad, telemetry=True)
+    assert approx_equal(res.x, np.ones(n))
+    assert res.termination == "converged"
+    assert res.iterations < 100
+
+
+def test_iter_lbfgs():
+    states = list(iter_lbfgs(f, grad, [-1.2, 1]))
+    assert approx_equal(states[-1].x, lbfgs(f, grad, [-1.2, 1]))
+    assert states[-1].grad_norm < 1e-3
+    assert [state.iteration_no for state in states] == list(range(1, len(states) + 1))
+
+
+def test_telemetry():
+    res = bfgs(f, grad, [-1.2, 1], telemetry=True)
+    assert approx_equal(res.x, [1, 1])
+    assert res.termination == "converged"
+    assert res.hessian_calls == 0
+    assert set(res.times) == {"direction", "strategy", "update", "total"}
+
+
+def test_finite_differences():
+    assert approx_equal(lbfgs(f, None, [-1.2, 1]), [1, 1], 1e-4)
+
+
+def test_unknown_strategy():
+    with pytest.raises(GradDescentException):
+        bfgs(f, grad, [0, 0], step_adjustment_strategy="barzilai_borwein")
@@ -0,0 +1,64 @@
+import numpy as np
+
+from methopt.stochastic_grad_descent import stochastic_grad_descent
+
+
+def make_least_squares(path, m=20000, n=5):
+    # rows are (a_i, b_i), f_i(x) = ((a_i, x) - b_i)^2 / 2
+    rng = np.random.default_rng(0)
+    x_true = rng.uniform(-1, 1, n)
+    data = np.memmap(path, dtype=np.float64, mode="w+", shape=(m, n + 1))
+    data[:, :n] = rng.normal(size=(m, n))
+    data[:, n] = data[:, :n] @ x_true + rng.normal(scale=1e-2, size=m)
+    data.flush()
+    return np.memmap(path, dtype=np.float64, mode="r", shape=(m, n + 1)), x_true
+
+
+def sample_grad(x, batch):
+    a, b = batch[:, :-1], batch[:, -1]
+    return a.T @ (a @ x - b) / len(batch)
+
+
+def test_stochastic_grad_descent(tmp_path):
+    data, x_true = make_least_squares(tmp_path / "data.bin")
+    x0 = np.zeros(len(x_true))
+
+    for method, initial_step in (("plain", 1e-2), ("momentum", 1e-3), ("adam", 1e-2)):
+        x = stochastic_grad_descent(
+            sample_grad,
+            data,
+            x0,
+            epochs=3,
+            method=method,
+            initial_step=initial_step,
+            decay=1e-3,
+            seed=0,
+        )
+        assert np.linalg.norm(x - x_true) < 1e-2
+
+
+def test_stochastic_grad_descent_chunks():
+    data = np.arange(1000, dtype=np.float64).reshape(-1, 1)
+    chunk_sizes = []
+
+    class Data:
+        def __len__(self):
+            return len(data)
+
+        def __getitem__(self, rows):
+            chunk_sizes.append(rows.stop - rows.start)
+            return data[rows]
+
+    seen = []
+
+    def sample_grad(x, batch):
+        seen.extend(batch[:, 0])
+        return np.zeros_like(x)
+
+    stochastic_grad_descent(
+        sample_grad, Data(), np.zeros(1), epochs=1, batch_size=10, chunk_size=100
+    )
+    # every row is seen once, and never more than a chunk is read at a time
+    assert sorted(seen) == list(data[:, 0])
+    assert max(chunk_sizes) == 100
+    assert seen != list(data[:, 0])